@@ -7,21 +7,101 @@ class Settings:
     # MongoDB
     MONGODB_URL: str = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
     DATABASE_NAME: str = os.getenv("DATABASE_NAME", "lms_db")
+    ENSURE_INDEXES_ON_STARTUP: bool = os.getenv("ENSURE_INDEXES_ON_STARTUP", "true").lower() == "true"
+    MONGO_TRANSACTIONS: str = os.getenv("MONGO_TRANSACTIONS", "auto")  # auto, on or off
     
     # JWT
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    REFRESH_TOKEN_EXPIRE_DAYS: int = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "14"))
+    REVOCATION_SYNC_SECONDS: float = float(os.getenv("REVOCATION_SYNC_SECONDS", "10"))
+    AUTH_CACHE_MAX_ENTRIES: int = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", "10000"))
+    AUTH_CACHE_TTL_SECONDS: int = int(os.getenv("AUTH_CACHE_TTL_SECONDS", "300"))
+    
+    # Password hashing and login throttling
+    BCRYPT_ROUNDS: int = int(os.getenv("BCRYPT_ROUNDS", "12"))
+    BCRYPT_WORKERS: int = int(os.getenv("BCRYPT_WORKERS", str(min(4, os.cpu_count() or 1))))
+    LOGIN_ATTEMPTS_PER_ACCOUNT: int = int(os.getenv("LOGIN_ATTEMPTS_PER_ACCOUNT", "5"))
+    LOGIN_ACCOUNT_WINDOW_SECONDS: int = int(os.getenv("LOGIN_ACCOUNT_WINDOW_SECONDS", "300"))
+    LOGIN_ATTEMPTS_PER_IP: int = int(os.getenv("LOGIN_ATTEMPTS_PER_IP", "30"))
+    LOGIN_IP_WINDOW_SECONDS: int = int(os.getenv("LOGIN_IP_WINDOW_SECONDS", "60"))
+    # Proxies whose X-Forwarded-For is trusted for the client IP (comma-separated, or *)
+    FORWARDED_ALLOW_IPS: str = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
     
     # OpenAI (keeping for backward compatibility)
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
     
     # Groq (new LLM provider)
     GROQ_API_KEY: str = os.getenv("GROQ_API_KEY", "")
+    GROQ_API_BASE: str = os.getenv("GROQ_API_BASE", "")  # e.g. a local fake LLM server
+    LLM_MAX_CONCURRENCY: int = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+    LLM_REQUESTS_PER_MINUTE: float = float(os.getenv("LLM_REQUESTS_PER_MINUTE", "30"))
+    LLM_MAX_RETRIES: int = int(os.getenv("LLM_MAX_RETRIES", "3"))
+    LLM_RETRY_BASE_DELAY: float = float(os.getenv("LLM_RETRY_BASE_DELAY", "1.0"))
+    LLM_TIMEOUT_SECONDS: float = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+    LLM_CHUNK_TOKENS: int = int(os.getenv("LLM_CHUNK_TOKENS", "2000"))
+    LLM_MAX_CHUNKS: int = int(os.getenv("LLM_MAX_CHUNKS", "8"))
+    LLM_CANDIDATE_FACTOR: float = float(os.getenv("LLM_CANDIDATE_FACTOR", "2"))
+    LLM_STREAMING: bool = os.getenv("LLM_STREAMING", "true").lower() == "true"
+    LLM_TOPUP_ATTEMPTS: int = int(os.getenv("LLM_TOPUP_ATTEMPTS", "1"))
+    LLM_CACHE_MAX_ENTRIES: int = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "512"))
+    LLM_CACHE_TTL_SECONDS: int = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
     
     # File Upload
     UPLOAD_DIR: str = "uploads"
     MAX_FILE_SIZE: int = 10 * 1024 * 1024  # 10MB
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024  # 1MB
+    
+    # Upload storage backend: local, gridfs or s3
+    STORAGE_BACKEND: str = os.getenv("STORAGE_BACKEND", "local")
+    GRIDFS_BUCKET: str = os.getenv("GRIDFS_BUCKET", "uploads")
+    S3_BUCKET: str = os.getenv("S3_BUCKET", "")
+    S3_PREFIX: str = os.getenv("S3_PREFIX", "")
+    S3_ENDPOINT_URL: str = os.getenv("S3_ENDPOINT_URL", "")  # e.g. MinIO or a local moto server
+    S3_REGION: str = os.getenv("S3_REGION", "")
+    S3_ACCESS_KEY_ID: str = os.getenv("S3_ACCESS_KEY_ID", "")
+    S3_SECRET_ACCESS_KEY: str = os.getenv("S3_SECRET_ACCESS_KEY", "")
+    
+    # Document delivery
+    DOWNLOAD_CHUNK_SIZE: int = 256 * 1024  # 256KB
+    DOCUMENT_CACHE_MAX_AGE: int = int(os.getenv("DOCUMENT_CACHE_MAX_AGE", str(365 * 24 * 3600)))
+    SIGNED_URL_TTL_SECONDS: int = int(os.getenv("SIGNED_URL_TTL_SECONDS", "900"))
+    
+    # PDF text extraction (process pool)
+    EXTRACTION_WORKERS: int = int(os.getenv("EXTRACTION_WORKERS", str(min(4, os.cpu_count() or 1))))
+    EXTRACTION_PAGES_PER_CHUNK: int = int(os.getenv("EXTRACTION_PAGES_PER_CHUNK", "25"))
+    EXTRACTION_TIMEOUT_SECONDS: float = float(os.getenv("EXTRACTION_TIMEOUT_SECONDS", "120"))
+    EXTRACTION_MEMORY_LIMIT_MB: int = int(os.getenv("EXTRACTION_MEMORY_LIMIT_MB", "1024"))
+    TEXT_STORE_COMPRESSION_LEVEL: int = int(os.getenv("TEXT_STORE_COMPRESSION_LEVEL", "6"))
+    
+    # Pagination
+    DEFAULT_PAGE_SIZE: int = int(os.getenv("DEFAULT_PAGE_SIZE", "50"))
+    MAX_PAGE_SIZE: int = int(os.getenv("MAX_PAGE_SIZE", "500"))
+    
+    # Quiz cache (compiled quizzes for the employee endpoints)
+    QUIZ_CACHE_MAX_ENTRIES: int = int(os.getenv("QUIZ_CACHE_MAX_ENTRIES", "1000"))
+    QUIZ_CACHE_TTL_SECONDS: int = int(os.getenv("QUIZ_CACHE_TTL_SECONDS", "300"))
+    
+    # Quiz progress autosave buffer
+    AUTOSAVE_FLUSH_SECONDS: float = float(os.getenv("AUTOSAVE_FLUSH_SECONDS", "2"))
+    AUTOSAVE_MAX_PENDING: int = int(os.getenv("AUTOSAVE_MAX_PENDING", "5000"))
+    
+    # Grading
+    REGRADE_BATCH_SIZE: int = int(os.getenv("REGRADE_BATCH_SIZE", "5000"))
+    
+    # Bulk assignment
+    ASSIGNMENT_BATCH_SIZE: int = int(os.getenv("ASSIGNMENT_BATCH_SIZE", "1000"))
+
+    # Search
+    SEARCH_RESULT_LIMIT: int = int(os.getenv("SEARCH_RESULT_LIMIT", "20"))
+    SEARCH_MAX_HITS: int = int(os.getenv("SEARCH_MAX_HITS", "500"))
+    SEARCH_HITS_PER_PDF: int = int(os.getenv("SEARCH_HITS_PER_PDF", "3"))
+    SEARCH_SNIPPET_CHARS: int = int(os.getenv("SEARCH_SNIPPET_CHARS", "200"))
+    
+    # Background jobs
+    JOB_WORKERS: int = int(os.getenv("JOB_WORKERS", "2"))
+    JOB_STALE_SECONDS: int = int(os.getenv("JOB_STALE_SECONDS", "900"))
     
     # CORS
     ALLOWED_ORIGINS: list = [
@@ -3,10 +3,17 @@ from .config import settings
 
 class Database:
     client: AsyncIOMotorClient = None
+    transactions: bool = None
     
-async def connect_to_mongo():
+async def connect_to_mongo(ensure: bool = settings.ENSURE_INDEXES_ON_STARTUP):
     Database.client = AsyncIOMotorClient(settings.MONGODB_URL)
     print("Connected to MongoDB!")
+    
+    if ensure:
+        from .indexes import ensure_indexes, print_index_report
+        report = await ensure_indexes(get_database())
+        print("Index report:")
+        print_index_report(report)
 
 async def close_mongo_connection():
     if Database.client:
@@ -14,4 +21,20 @@ async def close_mongo_connection():
         print("Disconnected from MongoDB!")
 
 def get_database():
-    return Database.client[settings.DATABASE_NAME] 
\ No newline at end of file
+    return Database.client[settings.DATABASE_NAME]
+
+def get_client() -> AsyncIOMotorClient:
+    return Database.client
+
+async def supports_transactions() -> bool:
+    """Whether multi-document transactions are available (replica set or sharded cluster)"""
+    if Database.transactions is None:
+        mode = settings.MONGO_TRANSACTIONS.lower()
+        if mode in ("on", "off"):
+            Database.transactions = mode == "on"
+        else:
+            hello = await Database.client.admin.command("hello")
+            Database.transactions = bool(hello.get("setName")) or hello.get("msg") == "isdbgrid"
+            print(f"MongoDB transactions {'enabled' if Database.transactions else 'unavailable (standalone server)'}")
+    return Database.transactions
+
@@ -0,0 +1,156 @@
+import asyncio
+import sys
+from typing import Any, Dict, List
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel
+from pymongo.errors import OperationFailure
+from .config import settings
+
+# Declarative index registry.
+#
+# Every index the application relies on is declared here, per collection, and
+# reconciled idempotently on startup and from init_db.py. Unique constraints
+# back the places where the code assumes at most one document per key.
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    "users": [
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        IndexModel([("role", ASCENDING), ("created_at", ASCENDING), ("_id", ASCENDING)], name="role_created_at"),
+    ],
+    "assignments": [
+        IndexModel([("user_id", ASCENDING), ("pdf_id", ASCENDING)], name="user_pdf_unique", unique=True),
+        # Keyset pages per user and per PDF walk these in `_id` order; the
+        # second also serves pdf_id-only lookups through its prefix
+        IndexModel([("user_id", ASCENDING), ("_id", ASCENDING)], name="user_id_id"),
+        IndexModel([("pdf_id", ASCENDING), ("_id", ASCENDING)], name="pdf_id_id"),
+    ],
+    "quizzes": [
+        IndexModel([("pdf_id", ASCENDING)], name="pdf_id_unique", unique=True),
+    ],
+    "quiz_submissions": [
+        IndexModel([("user_id", ASCENDING), ("quiz_id", ASCENDING)], name="user_quiz_unique", unique=True),
+        IndexModel([("quiz_id", ASCENDING)], name="quiz_id"),
+        # Keyset pages of a user's scores
+        IndexModel([("user_id", ASCENDING), ("_id", ASCENDING)], name="user_id_id"),
+    ],
+    "pdf_documents": [
+        IndexModel([("content_hash", ASCENDING)], name="content_hash"),
+    ],
+    "jobs": [
+        IndexModel([("status", ASCENDING), ("created_at", ASCENDING)], name="status_created_at"),
+        IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)], name="created_at_desc"),
+    ],
+    "llm_cache": [
+        IndexModel([("created_at", ASCENDING)], name="created_at_ttl", expireAfterSeconds=settings.LLM_CACHE_TTL_SECONDS),
+    ],
+    "revoked_tokens": [
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+        IndexModel([("revoked_at", ASCENDING)], name="revoked_at"),
+    ],
+    "search_index": [
+        IndexModel([("text", TEXT)], name="text_search", default_language="english"),
+        IndexModel([("pdf_id", ASCENDING), ("kind", ASCENDING)], name="pdf_id_kind"),
+    ],
+}
+
+# Index options that must match for an existing index to count as in place
+_COMPARED_OPTIONS = ("unique", "sparse", "expireAfterSeconds", "partialFilterExpression")
+
+def _normalize_options(spec: Dict[str, Any]) -> Dict[str, Any]:
+    options = {}
+    for option in _COMPARED_OPTIONS:
+        value = spec.get(option)
+        if option in ("unique", "sparse"):
+            value = bool(value)
+        if value is not None:
+            options[option] = value
+    return options
+
+def _is_text_index(key: List) -> bool:
+    return any(direction == "text" for _, direction in key)
+
+def _matches(declared: Dict[str, Any], existing: Dict[str, Any]) -> bool:
+    declared_key = list(declared["key"].items())
+    # Text indexes are stored with an internal key pattern; compare them by name
+    if not _is_text_index(declared_key):
+        existing_key = [(field, int(direction) if isinstance(direction, float) else direction)
+                        for field, direction in existing["key"]]
+        if declared_key != existing_key:
+            return False
+    return _normalize_options(declared) == _normalize_options(existing)
+
+async def ensure_indexes(db, create: bool = True, drop_extra: bool = False) -> Dict[str, Dict[str, List[str]]]:
+    """Reconcile the registry against the database.
+
+    Creates missing indexes (unless create=False) and reports indexes that are
+    missing, extra, or declared under the same name with a different spec.
+    Extra indexes are only dropped when drop_extra=True.
+    """
+    report = {}
+    for collection_name, models in INDEXES.items():
+        collection = db[collection_name]
+        entry = {"created": [], "missing": [], "extra": [], "conflicts": [], "errors": []}
+
+        try:
+            existing = await collection.index_information()
+        except OperationFailure:
+            # Collection does not exist yet
+            existing = {}
+
+        declared_names = set()
+        to_create = []
+        for model in models:
+            declared = model.document
+            name = declared["name"]
+            declared_names.add(name)
+            if name not in existing:
+                entry["missing"].append(name)
+                to_create.append(model)
+            elif not _matches(declared, existing[name]):
+                entry["conflicts"].append(name)
+
+        entry["extra"] = [name for name in existing if name != "_id_" and name not in declared_names]
+
+        if create:
+            for model in to_create:
+                name = model.document["name"]
+                try:
+                    await collection.create_indexes([model])
+                    entry["created"].append(name)
+                    entry["missing"].remove(name)
+                except OperationFailure as e:
+                    # e.g. duplicate data blocking a unique index; leave it reported
+                    entry["errors"].append(f"{name}: {e}")
+
+        if drop_extra:
+            for name in list(entry["extra"]):
+                await collection.drop_index(name)
+
+        report[collection_name] = entry
+    return report
+
+def print_index_report(report: Dict[str, Dict[str, List[str]]]):
+    for collection_name, entry in report.items():
+        problems = {key: names for key, names in entry.items() if names}
+        if not problems:
+            print(f"  {collection_name}: ok")
+            continue
+        for key, names in problems.items():
+            print(f"  {collection_name}: {key}: {', '.join(names)}")
+
+async def _main(argv: List[str]):
+    from .db import connect_to_mongo, close_mongo_connection, get_database
+
+    check_only = "--check" in argv
+    drop_extra = "--drop-extra" in argv
+
+    await connect_to_mongo(ensure=False)
+    try:
+        report = await ensure_indexes(get_database(), create=not check_only, drop_extra=drop_extra)
+        print("Index report:")
+        print_index_report(report)
+    finally:
+        await close_mongo_connection()
+
+if __name__ == "__main__":
+    # python -m app.core.indexes [--check] [--drop-extra]
+    asyncio.run(_main(sys.argv[1:]))
@@ -1,11 +1,16 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-import os
 
 from .core.config import settings
 from .core.db import connect_to_mongo, close_mongo_connection
-from .routes import auth, admin, employee
+from .utils.pagination import NEXT_CURSOR_HEADER
+from .utils.body_limit import UploadSizeLimitMiddleware
+from .services.pdf_extraction import start_extraction_service, stop_extraction_service
+from .services.jobs import start_job_workers, stop_job_workers
+from .services.revocation import start_revocation_sync, stop_revocation_sync
+from .services.autosave import start_autosave, stop_autosave
+from .services.progress import start_progress_backfill, stop_progress_backfill
+from .routes import auth, admin, employee, documents
 
 app = FastAPI(
     title="LMS API",
@@ -13,6 +18,10 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Refuse oversized uploads before their bodies are read (added first so
+# CORS, added after, wraps the 413)
+app.add_middleware(UploadSizeLimitMiddleware, paths=["/admin/upload_pdf"])
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -20,20 +29,28 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag", "Content-Range", "Accept-Ranges"],
 )
 
-# Database events
+# Lifecycle events
 app.add_event_handler("startup", connect_to_mongo)
+app.add_event_handler("startup", start_revocation_sync)
+app.add_event_handler("startup", start_extraction_service)
+app.add_event_handler("startup", start_job_workers)
+app.add_event_handler("startup", start_autosave)
+app.add_event_handler("startup", start_progress_backfill)
+app.add_event_handler("shutdown", stop_progress_backfill)
+app.add_event_handler("shutdown", stop_autosave)
+app.add_event_handler("shutdown", stop_job_workers)
+app.add_event_handler("shutdown", stop_extraction_service)
+app.add_event_handler("shutdown", stop_revocation_sync)
 app.add_event_handler("shutdown", close_mongo_connection)
 
 # Include routers
 app.include_router(auth.router)
 app.include_router(admin.router)
 app.include_router(employee.router)
-
-# Serve static files (PDFs)
-if os.path.exists(settings.UPLOAD_DIR):
-    app.mount("/uploads", StaticFiles(directory=settings.UPLOAD_DIR), name="uploads")
+app.include_router(documents.router)
 
 @app.get("/")
 async def root():
@@ -33,4 +33,5 @@ class PDFDocumentInDB(PDFDocumentBase):
 
 class PDFAssignmentRequest(BaseModel):
     pdf_id: str
-    user_ids: list[str] 
\ No newline at end of file
+    user_ids: list[str] = []
+    role: Optional[str] = None  # assign to every user with this role, e.g. "employee" 
\ No newline at end of file
@@ -33,4 +33,8 @@ class QuizInDB(QuizBase):
 
 class QuizSubmissionRequest(BaseModel):
     quiz_id: str
-    answers: Dict[str, Any] 
\ No newline at end of file
+    answers: Dict[str, Any]
+
+class AnswerKeyUpdate(BaseModel):
+    answers: Dict[str, str]  # question index -> corrected answer (one of its options)
+    regrade: bool = True
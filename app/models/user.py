@@ -26,6 +26,12 @@ class UserBase(BaseModel):
 class UserCreate(UserBase):
     password: str
 
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+class UserRoleUpdate(BaseModel):
+    role: str  # admin or employee
+
 class UserLogin(BaseModel):
     email: EmailStr
     password: str
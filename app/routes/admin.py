@@ -1,11 +1,25 @@
-from fastapi import APIRouter, HTTPException, status, Depends, UploadFile, File, Form
+from fastapi import APIRouter, HTTPException, status, Depends, UploadFile, File, Form, Response, Path, Query
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from typing import List
 from ..utils.auth import get_current_user_from_token
-from ..utils.file_upload import save_upload_file, extract_text_from_pdf
-from ..services.llm_quiz_gen import LLMQuizGenerator
+from ..utils.pagination import PageParams, page_params, paginate_find, set_next_cursor
+from ..services import pdf_store, search, progress
+from ..services.storage import get_storage
+from ..services.llm_cache import llm_cache
+from ..services.auth_cache import auth_cache
+from ..services.revocation import revocation_list
+from ..services.quiz_cache import quiz_cache
+from ..services.grading import regrade_quiz
+from ..services.autosave import autosave_buffer
+from ..services.assignments import assign_to_users, assign_to_role
+from ..services.reports import get_user_progress_report, get_pdf_progress_report
+from ..services.jobs import job_manager, serialize_job, create_pdf_records, JOB_PDF_UPLOAD, JOB_QUIZ_REGENERATE, JOB_QUEUED, JOB_DONE
+from ..core.config import settings
 from ..core.db import get_database
 from ..models.pdf import PDFAssignmentRequest
+from ..models.user import UserRoleUpdate
+from ..models.quiz import AnswerKeyUpdate
+from pymongo import ReturnDocument
 from datetime import datetime
 from bson import ObjectId
 
@@ -22,70 +36,277 @@ async def get_current_admin(credentials: HTTPAuthorizationCredentials = Depends(
         )
     return payload
 
-@router.post("/upload_pdf")
+@router.post("/upload_pdf", status_code=status.HTTP_202_ACCEPTED)
 async def upload_pdf(
+    response: Response,
     file: UploadFile = File(...),
     title: str = Form(...),
     description: str = Form(""),
     current_admin: dict = Depends(get_current_admin)
 ):
-    """Upload PDF and auto-generate quiz"""
+    """Upload PDF and queue quiz generation"""
+    # Store PDF by content hash
+    blob = await pdf_store.store_upload(file)
+    
+    payload = {
+        "content_hash": blob["_id"],
+        "title": title,
+        "description": description
+    }
+    
+    # Same bytes were uploaded before: link to the existing quiz right away
+    if blob.get("quiz_questions"):
+        try:
+            result = await create_pdf_records(payload, ObjectId(current_admin["sub"]), blob["quiz_questions"])
+        except Exception:
+            await pdf_store.release(blob["_id"])
+            raise
+        response.status_code = status.HTTP_201_CREATED
+        return {
+            "message": "PDF uploaded, existing quiz reused",
+            "job_id": None,
+            "status": JOB_DONE,
+            **result
+        }
+    
+    # Extraction, quiz generation and persistence run in the background
+    job_id = await job_manager.enqueue(
+        JOB_PDF_UPLOAD,
+        payload,
+        created_by=ObjectId(current_admin["sub"])
+    )
+    
+    return {
+        "message": "PDF uploaded, quiz generation queued",
+        "job_id": job_id,
+        "status": JOB_QUEUED
+    }
+
+@router.post("/regenerate_quiz/{pdf_id}", status_code=status.HTTP_202_ACCEPTED)
+async def regenerate_quiz(
+    pdf_id: str,
+    current_admin: dict = Depends(get_current_admin)
+):
+    """Queue generation of a fresh quiz from the PDF's stored text"""
     db = get_database()
     
-    # Save PDF file
-    file_path = await save_upload_file(file)
+    pdf = await db.pdf_documents.find_one({"_id": ObjectId(pdf_id)})
+    if not pdf:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="PDF not found"
+        )
+    
+    job_id = await job_manager.enqueue(
+        JOB_QUIZ_REGENERATE,
+        {"pdf_id": str(pdf["_id"])},
+        created_by=ObjectId(current_admin["sub"])
+    )
     
-    # Extract text from PDF
-    pdf_text = extract_text_from_pdf(file_path)
+    return {
+        "message": "Quiz regeneration queued",
+        "job_id": job_id,
+        "status": JOB_QUEUED
+    }
+
+@router.put("/quiz/{pdf_id}/answers")
+async def update_answer_key(
+    pdf_id: str,
+    update: AnswerKeyUpdate,
+    current_admin: dict = Depends(get_current_admin)
+):
+    """Correct quiz answers and regrade existing submissions"""
+    db = get_database()
     
-    # Generate quiz using LLM
-    quiz_generator = LLMQuizGenerator()
-    quiz_questions = await quiz_generator.generate_quiz_from_text(pdf_text)
+    quiz = await db.quizzes.find_one({"pdf_id": ObjectId(pdf_id)})
+    if not quiz:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Quiz not found for this PDF"
+        )
     
-    # Debug: Print quiz questions JSON to terminal
-    print("Generated Quiz Questions:", quiz_questions)
+    # Validate every correction before writing any
+    questions = quiz["questions_json"]
+    corrections = {}
+    for index, answer in update.answers.items():
+        if not index.isdigit() or int(index) >= len(questions):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"No question {index}"
+            )
+        if answer not in questions[int(index)].get("options", []):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Answer for question {index} must be one of its options"
+            )
+        corrections[f"questions_json.{int(index)}.answer"] = answer
+    
+    quiz = await db.quizzes.find_one_and_update(
+        {"_id": quiz["_id"]},
+        {"$set": {**corrections, "updated_at": datetime.utcnow()}, "$inc": {"version": 1}},
+        return_document=ReturnDocument.AFTER
+    )
+    quiz_cache.invalidate(quiz["pdf_id"])
+    
+    # Re-uploads of the same bytes reuse the corrected quiz
+    pdf = await db.pdf_documents.find_one({"_id": quiz["pdf_id"]}, {"content_hash": 1})
+    if pdf and pdf.get("content_hash"):
+        await pdf_store.cache_quiz(pdf["content_hash"], quiz["questions_json"])
+    
+    result = {"message": "Answer key updated", "version": quiz["version"], "regrade": None}
+    if update.regrade:
+        result["regrade"] = await regrade_quiz(db, quiz)
+    return result
 
-    # Save quiz questions JSON to a file
-    with open("quiz_questions.json", "w") as file:
-        import json
-        json.dump(quiz_questions, file, indent=4)
+@router.post("/regrade_quiz/{pdf_id}")
+async def regrade_quiz_submissions(
+    pdf_id: str,
+    current_admin: dict = Depends(get_current_admin)
+):
+    """Regrade every submission of a PDF's quiz against its current answer key"""
+    db = get_database()
+    
+    quiz = await db.quizzes.find_one({"pdf_id": ObjectId(pdf_id)})
+    if not quiz:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Quiz not found for this PDF"
+        )
+    
+    return await regrade_quiz(db, quiz)
 
-    # Save PDF document
-    pdf_doc = {
-        "title": title,
-        "description": description,
-        "file_url": file_path,
-        "uploaded_by": ObjectId(current_admin["sub"]),
-        "created_at": datetime.utcnow()
-    }
+@router.get("/pdf/{pdf_id}/pages/{page_number}")
+async def get_pdf_page(
+    pdf_id: str,
+    page_number: int = Path(..., ge=1),
+    current_admin: dict = Depends(get_current_admin)
+):
+    """Get the extracted text of one PDF page"""
+    db = get_database()
     
-    pdf_result = await db.pdf_documents.insert_one(pdf_doc)
-    pdf_id = pdf_result.inserted_id
+    pdf = await db.pdf_documents.find_one({"_id": ObjectId(pdf_id)})
+    if not pdf:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="PDF not found"
+        )
     
-    # Save quiz
-    quiz_doc = {
-        "pdf_id": pdf_id,
-        "questions_json": quiz_questions,
-        "created_at": datetime.utcnow()
-    }
+    return await pdf_store.read_document_page(pdf, page_number)
+
+@router.get("/search")
+async def search_library(
+    q: str = Query(..., min_length=2, max_length=200),
+    limit: int = Query(settings.SEARCH_RESULT_LIMIT, ge=1, le=100),
+    current_admin: dict = Depends(get_current_admin)
+):
+    """Search PDF titles, page text and quiz questions"""
+    db = get_database()
     
-    quiz_result = await db.quizzes.insert_one(quiz_doc)
+    results = await search.search(db, q, limit=limit)
     
+    return {"query": q, "results": results}
+
+@router.delete("/pdf/{pdf_id}")
+async def delete_pdf(
+    pdf_id: str,
+    current_admin: dict = Depends(get_current_admin)
+):
+    """Delete a PDF with its quiz, assignments and submissions"""
+    db = get_database()
+    
+    pdf = await db.pdf_documents.find_one({"_id": ObjectId(pdf_id)})
+    if not pdf:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="PDF not found"
+        )
+    
+    quiz = await db.quizzes.find_one({"pdf_id": pdf["_id"]})
+    await progress.remove_pdf(db, pdf["_id"], quiz["_id"] if quiz else None)
+    if quiz:
+        await db.quiz_submissions.delete_many({"quiz_id": quiz["_id"]})
+        await db.quizzes.delete_one({"_id": quiz["_id"]})
+    await db.assignments.delete_many({"pdf_id": pdf["_id"]})
+    await db.pdf_documents.delete_one({"_id": pdf["_id"]})
+    await search.remove_document(db, pdf["_id"])
+    quiz_cache.invalidate(pdf["_id"])
+    
+    # Stored bytes are removed only when no other document references them
+    if pdf.get("content_hash"):
+        await pdf_store.release(pdf["content_hash"])
+    else:
+        await get_storage().delete(pdf_store.storage_key(pdf))
+    
+    return {"message": "PDF deleted"}
+
+@router.get("/cache_stats")
+async def get_cache_stats(current_admin: dict = Depends(get_current_admin)):
+    """Get hit/miss counters for in-process caches"""
     return {
-        "message": "PDF uploaded and quiz generated successfully",
-        "pdf_id": str(pdf_id),
-        "quiz_id": str(quiz_result.inserted_id),
-        "questions_count": len(quiz_questions)
+        "llm": llm_cache.get_stats(),
+        "auth": auth_cache.get_stats(),
+        "quiz": quiz_cache.get_stats(),
+        "autosave": autosave_buffer.get_stats()
     }
 
+@router.post("/progress/rebuild")
+async def rebuild_progress(current_admin: dict = Depends(get_current_admin)):
+    """Recompute progress counters from assignments and submissions"""
+    db = get_database()
+    
+    return await progress.rebuild(db)
+
+@router.get("/jobs")
+async def get_jobs(
+    response: Response,
+    page: PageParams = Depends(page_params),
+    current_admin: dict = Depends(get_current_admin)
+):
+    """Get recent background jobs, newest first"""
+    db = get_database()
+    
+    jobs, next_cursor = await paginate_find(db.jobs, {}, page, ["created_at", "_id"], direction=-1)
+    set_next_cursor(response, next_cursor)
+    
+    return [serialize_job(job) for job in jobs]
+
+@router.get("/jobs/{job_id}")
+async def get_job(
+    job_id: str,
+    current_admin: dict = Depends(get_current_admin)
+):
+    """Get state of a background job"""
+    db = get_database()
+    
+    if not ObjectId.is_valid(job_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    
+    job = await db.jobs.find_one({"_id": ObjectId(job_id)})
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    
+    return serialize_job(job)
+
 @router.post("/assign_pdf")
 async def assign_pdf(
     assignment_data: PDFAssignmentRequest,
     current_admin: dict = Depends(get_current_admin)
 ):
-    """Assign PDF to employees"""
+    """Assign PDF to employees, by id or by role"""
     db = get_database()
     
+    if bool(assignment_data.user_ids) == bool(assignment_data.role):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide either user_ids or role"
+        )
+    
     # Validate PDF exists
     pdf = await db.pdf_documents.find_one({"_id": ObjectId(assignment_data.pdf_id)})
     if not pdf:
@@ -94,39 +315,35 @@ async def assign_pdf(
             detail="PDF not found"
         )
     
-    # Create assignments
-    assignments = []
-    for user_id in assignment_data.user_ids:
-        # Check if assignment already exists
-        existing = await db.assignments.find_one({
-            "user_id": ObjectId(user_id),
-            "pdf_id": ObjectId(assignment_data.pdf_id)
-        })
-        
-        if not existing:
-            assignment = {
-                "user_id": ObjectId(user_id),
-                "pdf_id": ObjectId(assignment_data.pdf_id),
-                "is_read": False,
-                "is_quiz_completed": False,
-                "created_at": datetime.utcnow()
-            }
-            assignments.append(assignment)
-    
-    if assignments:
-        await db.assignments.insert_many(assignments)
+    # Create assignments, skipping users who already have one
+    if assignment_data.role:
+        counts = await assign_to_role(db, pdf["_id"], assignment_data.role)
+    else:
+        if not all(ObjectId.is_valid(user_id) for user_id in assignment_data.user_ids):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid user id"
+            )
+        user_ids = [ObjectId(user_id) for user_id in assignment_data.user_ids]
+        counts = await assign_to_users(db, pdf["_id"], user_ids)
     
     return {
-        "message": f"PDF assigned to {len(assignments)} users",
-        "assigned_count": len(assignments)
+        "message": f"PDF assigned to {counts['inserted']} users",
+        "assigned_count": counts["inserted"],
+        "skipped_count": counts["skipped"]
     }
 
 @router.get("/users")
-async def get_all_users(current_admin: dict = Depends(get_current_admin)):
+async def get_all_users(
+    response: Response,
+    page: PageParams = Depends(page_params),
+    current_admin: dict = Depends(get_current_admin)
+):
     """Get all employees"""
     db = get_database()
     
-    users = await db.users.find({"role": "employee"}).to_list(length=100)
+    users, next_cursor = await paginate_find(db.users, {"role": "employee"}, page, ["created_at", "_id"])
+    set_next_cursor(response, next_cursor)
     
     return [
         {
@@ -138,9 +355,41 @@ async def get_all_users(current_admin: dict = Depends(get_current_admin)):
         for user in users
     ]
 
+@router.put("/user/{user_id}/role")
+async def update_user_role(
+    user_id: str,
+    role_update: UserRoleUpdate,
+    current_admin: dict = Depends(get_current_admin)
+):
+    """Change a user's role; their existing tokens stop working"""
+    db = get_database()
+    
+    if role_update.role not in ["admin", "employee"]:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Role must be admin or employee"
+        )
+    
+    result = await db.users.update_one(
+        {"_id": ObjectId(user_id)},
+        {"$set": {"role": role_update.role}}
+    )
+    if result.matched_count == 0:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    
+    # Tokens carry the old role, so the user has to log in again
+    await revocation_list.revoke_user(user_id)
+    auth_cache.invalidate_user(user_id)
+    
+    return {"message": "User role updated", "role": role_update.role}
+
 @router.get("/user/{user_id}")
 async def get_user_progress(
     user_id: str,
+    page: PageParams = Depends(page_params),
     current_admin: dict = Depends(get_current_admin)
 ):
     """Get user's progress and scores"""
@@ -154,21 +403,8 @@ async def get_user_progress(
             detail="User not found"
         )
     
-    # Get user's assignments
-    assignments = await db.assignments.find({"user_id": ObjectId(user_id)}).to_list(length=100)
-    
-    # Get detailed assignment info
-    detailed_assignments = []
-    for assignment in assignments:
-        pdf = await db.pdf_documents.find_one({"_id": assignment["pdf_id"]})
-        if pdf:
-            detailed_assignments.append({
-                "pdf_title": pdf["title"],
-                "is_read": assignment["is_read"],
-                "read_at": assignment.get("read_at"),
-                "is_quiz_completed": assignment["is_quiz_completed"],
-                "quiz_completed_at": assignment.get("quiz_completed_at")
-            })
+    # Totals from the materialized counters plus one page of detail
+    report = await get_user_progress_report(db, user["_id"], page)
     
     return {
         "user": {
@@ -176,12 +412,13 @@ async def get_user_progress(
             "name": user["name"],
             "email": user["email"]
         },
-        "assignments": detailed_assignments
+        **report
     }
 
 @router.get("/pdf_status/{pdf_id}")
 async def get_pdf_status(
     pdf_id: str,
+    page: PageParams = Depends(page_params),
     current_admin: dict = Depends(get_current_admin)
 ):
     """Get progress status for a specific PDF"""
@@ -195,27 +432,10 @@ async def get_pdf_status(
             detail="PDF not found"
         )
     
-    # Get all assignments for this PDF
-    assignments = await db.assignments.find({"pdf_id": ObjectId(pdf_id)}).to_list(length=100)
-    
-    # Get user details for each assignment
-    detailed_assignments = []
-    for assignment in assignments:
-        user = await db.users.find_one({"_id": assignment["user_id"]})
-        if user:
-            detailed_assignments.append({
-                "user_name": user["name"],
-                "user_email": user["email"],
-                "is_read": assignment["is_read"],
-                "read_at": assignment.get("read_at"),
-                "is_quiz_completed": assignment["is_quiz_completed"],
-                "quiz_completed_at": assignment.get("quiz_completed_at")
-            })
+    # Totals from the materialized counters plus one page of detail
+    report = await get_pdf_progress_report(db, pdf["_id"], page)
     
     return {
         "pdf_title": pdf["title"],
-        "total_assignments": len(detailed_assignments),
-        "read_count": sum(1 for a in detailed_assignments if a["is_read"]),
-        "completed_count": sum(1 for a in detailed_assignments if a["is_quiz_completed"]),
-        "assignments": detailed_assignments
+        **report
     }
\ No newline at end of file
@@ -1,19 +1,27 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from ..models.user import UserLogin, UserCreate, UserResponse
-from ..utils.auth import verify_password, get_password_hash, create_access_token, get_current_user_from_token
+from ..models.user import UserLogin, UserCreate, UserResponse, RefreshRequest
+from ..utils.auth import (
+    verify_and_update_password, hash_password, check_login_rate, reset_login_rate,
+    issue_token_pair, verify_token, get_current_user_from_token,
+    token_expiry, family_expiry, revocation_id
+)
 from ..core.db import get_database
+from ..services.auth_cache import auth_cache
+from ..services.revocation import revocation_list
 from datetime import datetime
-from bson import ObjectId
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 security = HTTPBearer()
 
 @router.post("/login")
-async def login(user_credentials: UserLogin):
+async def login(user_credentials: UserLogin, request: Request):
     """Login user and return access token"""
     db = get_database()
     
+    # Throttle before the database lookup and password hashing
+    check_login_rate(user_credentials.email, request.client.host if request.client else "unknown")
+    
     # Find user by email
     user = await db.users.find_one({"email": user_credentials.email})
     if not user:
@@ -23,20 +31,23 @@ async def login(user_credentials: UserLogin):
         )
     
     # Verify password
-    if not verify_password(user_credentials.password, user["password_hash"]):
+    valid, new_hash = await verify_and_update_password(user_credentials.password, user["password_hash"])
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
         )
+    reset_login_rate(user_credentials.email)
     
-    # Create access token
-    access_token = create_access_token(
-        data={"sub": str(user["_id"]), "email": user["email"], "role": user["role"]}
-    )
+    # Rehash with the current work factor
+    if new_hash:
+        await db.users.update_one({"_id": user["_id"]}, {"$set": {"password_hash": new_hash}})
+    
+    # Create access and refresh tokens
+    tokens = issue_token_pair(user)
     
     return {
-        "access_token": access_token,
-        "token_type": "bearer",
+        **tokens,
         "user": {
             "id": str(user["_id"]),
             "name": user["name"],
@@ -45,6 +56,35 @@ async def login(user_credentials: UserLogin):
         }
     }
 
+@router.post("/refresh")
+async def refresh(refresh_request: RefreshRequest):
+    """Exchange a refresh token for a new access and refresh token"""
+    invalid = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid refresh token",
+        headers={"WWW-Authenticate": "Bearer"}
+    )
+    
+    payload = verify_token(refresh_request.refresh_token)
+    if payload is None or payload.get("type") != "refresh":
+        raise invalid
+    if await revocation_list.is_revoked_strict(payload["fam"]) or await revocation_list.issued_before_cutoff_strict(payload):
+        raise invalid
+    
+    # Rotation: each refresh token works once, even across replicas
+    first_use = await revocation_list.revoke(payload["jti"], token_expiry(payload), reason="rotated")
+    if not first_use:
+        # A rotated token came back, so the session is treated as stolen
+        await revocation_list.revoke(payload["fam"], family_expiry(), reason="reuse")
+        raise invalid
+    
+    # Fresh profile, so role changes apply from the next refresh
+    user = await auth_cache.get_user(payload["sub"])
+    if not user:
+        raise invalid
+    
+    return issue_token_pair(user, family=payload["fam"])
+
 @router.post("/register")
 async def register(user_data: UserCreate):
     """Register a new user (admin only)"""
@@ -59,7 +99,7 @@ async def register(user_data: UserCreate):
         )
     
     # Hash password
-    password_hash = get_password_hash(user_data.password)
+    password_hash = await hash_password(user_data.password)
     
     # Create user
     user_doc = {
@@ -79,9 +119,8 @@ async def register(user_data: UserCreate):
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     """Get current user information"""
     payload = get_current_user_from_token(credentials.credentials)
-    db = get_database()
     
-    user = await db.users.find_one({"_id": ObjectId(payload["sub"])})
+    user = await auth_cache.get_user(payload["sub"])
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -94,4 +133,17 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
         "email": user["email"],
         "role": user["role"],
         "created_at": user["created_at"]
-    } 
\ No newline at end of file
+    }
+
+@router.post("/logout")
+async def logout(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    """Revoke the current access token and its refresh tokens"""
+    token = credentials.credentials
+    payload = get_current_user_from_token(token)
+    
+    await revocation_list.revoke(revocation_id(token, payload), token_expiry(payload))
+    if payload.get("fam"):
+        await revocation_list.revoke(payload["fam"], family_expiry())
+    auth_cache.invalidate_token(token)
+    
+    return {"message": "Logged out"}
@@ -0,0 +1,102 @@
+from fastapi import APIRouter, HTTPException, status, Depends, Request, Query
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from typing import Optional
+from ..utils.auth import get_current_user_from_token
+from ..utils.file_response import file_response
+from ..utils.signed_urls import sign_url, verify_signature
+from ..services import pdf_store
+from ..services.storage import get_storage
+from ..core.config import settings
+from ..core.db import get_database
+from datetime import datetime
+from bson import ObjectId
+import time
+
+router = APIRouter(prefix="/documents", tags=["Documents"])
+security = HTTPBearer(auto_error=False)
+
+async def get_optional_user(credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)):
+    """Get current user of any role, if a bearer token was sent"""
+    if credentials is None:
+        return None
+    return get_current_user_from_token(credentials.credentials)
+
+async def _get_accessible_pdf(pdf_id: str, user: dict) -> dict:
+    """The PDF if `user` may read it; employees only see PDFs assigned to them"""
+    db = get_database()
+    
+    pdf = await db.pdf_documents.find_one({"_id": ObjectId(pdf_id)})
+    if pdf and user["role"] != "admin":
+        assignment = await db.assignments.find_one({
+            "user_id": ObjectId(user["sub"]),
+            "pdf_id": pdf["_id"]
+        })
+        if not assignment:
+            pdf = None
+    
+    if not pdf:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="PDF not found"
+        )
+    return pdf
+
+@router.api_route("/{pdf_id}", methods=["GET", "HEAD"])
+async def get_document(
+    pdf_id: str,
+    request: Request,
+    expires: Optional[int] = Query(None),
+    signature: Optional[str] = Query(None),
+    current_user: Optional[dict] = Depends(get_optional_user)
+):
+    """Download a PDF, with byte ranges and conditional requests"""
+    if expires is not None and signature and verify_signature(request.url.path, expires, signature):
+        # A signed link grants access on its own
+        pdf = await get_database().pdf_documents.find_one({"_id": ObjectId(pdf_id)})
+        if not pdf:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="PDF not found"
+            )
+    elif current_user:
+        pdf = await _get_accessible_pdf(pdf_id, current_user)
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    
+    return await file_response(
+        request,
+        pdf_store.storage_key(pdf),
+        etag=pdf_store.document_etag(pdf),
+        filename=f"{pdf_id}.pdf"
+    )
+
+@router.get("/{pdf_id}/link")
+async def get_document_link(
+    pdf_id: str,
+    current_user: Optional[dict] = Depends(get_optional_user)
+):
+    """Get an expiring URL for a PDF that needs no Authorization header"""
+    if not current_user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    pdf = await _get_accessible_pdf(pdf_id, current_user)
+    
+    # Backends with their own presigned URLs serve the bytes directly
+    ttl = settings.SIGNED_URL_TTL_SECONDS
+    url = await get_storage().signed_url(pdf_store.storage_key(pdf), ttl, filename=f"{pdf_id}.pdf")
+    if url:
+        expires = int(time.time()) + ttl
+    else:
+        url, expires = sign_url(pdf_store.document_url(pdf["_id"]), ttl)
+    
+    return {
+        "url": url,
+        "expires_at": datetime.utcfromtimestamp(expires)
+    }
@@ -1,9 +1,17 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Response, Path, Query
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from typing import Dict, Any
 from ..utils.auth import get_current_user_from_token
+from ..core.config import settings
 from ..core.db import get_database
+from ..utils.pagination import PageParams, page_params, set_next_cursor
+from ..services import pdf_store, search, submissions, progress
+from ..services.reports import get_employee_pdfs, get_employee_scores
+from ..services.quiz_cache import quiz_cache
+from ..services.grading import grade_submission
+from ..services.autosave import autosave_buffer
 from ..models.quiz import QuizSubmissionRequest
+from pymongo import ReturnDocument
 from datetime import datetime
 from bson import ObjectId
 
@@ -21,38 +29,17 @@ async def get_current_employee(credentials: HTTPAuthorizationCredentials = Depen
     return payload
 
 @router.get("/my_pdfs")
-async def get_my_pdfs(current_employee: dict = Depends(get_current_employee)):
+async def get_my_pdfs(
+    response: Response,
+    page: PageParams = Depends(page_params),
+    current_employee: dict = Depends(get_current_employee)
+):
     """Get PDFs assigned to current employee"""
     db = get_database()
     
-    # Get assignments for current user
-    assignments = await db.assignments.find({"user_id": ObjectId(current_employee["sub"])}).to_list(length=100)
-    
-    # Get detailed PDF info
-    pdfs = []
-    for assignment in assignments:
-        pdf = await db.pdf_documents.find_one({"_id": assignment["pdf_id"]})
-        if pdf:
-            # Get quiz submission if exists
-            quiz = await db.quizzes.find_one({"pdf_id": assignment["pdf_id"]})
-            submission = None
-            if quiz:
-                submission = await db.quiz_submissions.find_one({
-                    "user_id": ObjectId(current_employee["sub"]),
-                    "quiz_id": quiz["_id"]
-                })
-            
-            pdfs.append({
-                "pdf_id": str(pdf["_id"]),
-                "title": pdf["title"],
-                "description": pdf.get("description", ""),
-                "file_url": pdf["file_url"],
-                "is_read": assignment["is_read"],
-                "read_at": assignment.get("read_at"),
-                "is_quiz_completed": assignment["is_quiz_completed"],
-                "quiz_completed_at": assignment.get("quiz_completed_at"),
-                "score": submission["score"] if submission else None
-            })
+    # Assignments joined with PDF, quiz and submission in a single aggregation
+    pdfs, next_cursor = await get_employee_pdfs(db, ObjectId(current_employee["sub"]), page)
+    set_next_cursor(response, next_cursor)
     
     return pdfs
 
@@ -64,8 +51,8 @@ async def mark_pdf_as_read(
     """Mark a PDF as read"""
     db = get_database()
     
-    # Update assignment
-    result = await db.assignments.update_one(
+    # Update assignment, keeping its previous read state
+    previous = await db.assignments.find_one_and_update(
         {
             "user_id": ObjectId(current_employee["sub"]),
             "pdf_id": ObjectId(pdf_id)
@@ -75,17 +62,59 @@ async def mark_pdf_as_read(
                 "is_read": True,
                 "read_at": datetime.utcnow()
             }
-        }
+        },
+        projection={"is_read": 1},
+        return_document=ReturnDocument.BEFORE
     )
     
-    if result.matched_count == 0:
+    if not previous:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="PDF assignment not found"
         )
     
+    # Only the first read counts
+    if not previous.get("is_read"):
+        await progress.record_read(db, ObjectId(current_employee["sub"]), ObjectId(pdf_id))
+    
     return {"message": "PDF marked as read"}
 
+@router.get("/pdf/{pdf_id}/pages/{page_number}")
+async def get_pdf_page(
+    pdf_id: str,
+    page_number: int = Path(..., ge=1),
+    current_employee: dict = Depends(get_current_employee)
+):
+    """Get the extracted text of one page of an assigned PDF"""
+    db = get_database()
+    
+    assignment = await db.assignments.find_one({
+        "user_id": ObjectId(current_employee["sub"]),
+        "pdf_id": ObjectId(pdf_id)
+    })
+    pdf = await db.pdf_documents.find_one({"_id": ObjectId(pdf_id)}) if assignment else None
+    if not pdf:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="PDF assignment not found"
+        )
+    
+    return await pdf_store.read_document_page(pdf, page_number)
+
+@router.get("/search")
+async def search_my_pdfs(
+    q: str = Query(..., min_length=2, max_length=200),
+    limit: int = Query(settings.SEARCH_RESULT_LIMIT, ge=1, le=100),
+    current_employee: dict = Depends(get_current_employee)
+):
+    """Search the PDFs assigned to the current employee"""
+    db = get_database()
+    
+    pdf_ids = await db.assignments.distinct("pdf_id", {"user_id": ObjectId(current_employee["sub"])})
+    results = await search.search(db, q, pdf_ids=pdf_ids, limit=limit) if pdf_ids else []
+    
+    return {"query": q, "results": results}
+
 @router.get("/quiz/{pdf_id}")
 async def get_quiz(
     pdf_id: str,
@@ -94,8 +123,8 @@ async def get_quiz(
     """Get quiz for a PDF with saved progress"""
     db = get_database()
     
-    # Get quiz
-    quiz = await db.quizzes.find_one({"pdf_id": ObjectId(pdf_id)})
+    # Get quiz, with answers stripped
+    quiz = await quiz_cache.get_by_pdf(ObjectId(pdf_id))
     if not quiz:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -105,14 +134,20 @@ async def get_quiz(
     # Get saved progress
     submission = await db.quiz_submissions.find_one({
         "user_id": ObjectId(current_employee["sub"]),
-        "quiz_id": quiz["_id"]
+        "quiz_id": quiz.quiz_id
     })
     
+    # Include autosaves this process hasn't flushed yet
+    saved_answers = (submission.get("in_progress_json") if submission else None) or {}
+    saved_answers = {**saved_answers, **autosave_buffer.pending(ObjectId(current_employee["sub"]), quiz.quiz_id)}
+    
     return {
-        "quiz_id": str(quiz["_id"]),
-        "questions": quiz["questions_json"],
-        "saved_answers": submission["in_progress_json"] if submission else None,
-        "is_completed": submission["score"] is not None if submission else False
+        "quiz_id": str(quiz.quiz_id),
+        "version": quiz.version,
+        "questions": quiz.questions,
+        "saved_answers": saved_answers or None,
+        # A submission graded for an earlier version can be retaken
+        "is_completed": submissions.is_graded_for(submission, quiz.version)
     }
 
 @router.post("/save_quiz_progress")
@@ -122,22 +157,22 @@ async def save_quiz_progress(
     current_employee: dict = Depends(get_current_employee)
 ):
     """Save incomplete quiz answers"""
-    db = get_database()
+    # Answers are stored per question index, so keys become field paths
+    if not all(key.isdigit() for key in answers):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Answer keys must be question indices"
+        )
     
-    # Upsert submission with in-progress answers
-    await db.quiz_submissions.update_one(
-        {
-            "user_id": ObjectId(current_employee["sub"]),
-            "quiz_id": ObjectId(quiz_id)
-        },
-        {
-            "$set": {
-                "in_progress_json": answers,
-                "updated_at": datetime.utcnow()
-            }
-        },
-        upsert=True
-    )
+    quiz = await quiz_cache.get_by_id(ObjectId(quiz_id))
+    if not quiz:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Quiz not found"
+        )
+    
+    # Buffered and written in batches; repeated saves are merged
+    autosave_buffer.save(ObjectId(current_employee["sub"]), quiz.quiz_id, quiz.version, answers)
     
     return {"message": "Quiz progress saved"}
 
@@ -149,90 +184,49 @@ async def submit_quiz(
     """Submit quiz and calculate score"""
     db = get_database()
     
-    # Get quiz
-    quiz = await db.quizzes.find_one({"_id": ObjectId(submission_data.quiz_id)})
+    # Get compiled quiz, confirming the cached answer key is still current
+    quiz = await quiz_cache.get_current(ObjectId(submission_data.quiz_id))
     if not quiz:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Quiz not found"
         )
     
-    # Calculate score
-    questions = quiz["questions_json"]
-    correct_answers = 0
-    total_questions = len(questions)
-    
-    for i, question in enumerate(questions):
-        user_answer = submission_data.answers.get(str(i))
-        if user_answer == question["answer"]:
-            correct_answers += 1
-    
-    score = (correct_answers / total_questions) * 100 if total_questions > 0 else 0
-    
-    # Save submission
-    submission_doc = {
-        "user_id": ObjectId(current_employee["sub"]),
-        "quiz_id": ObjectId(submission_data.quiz_id),
-        "responses_json": submission_data.answers,
-        "in_progress_json": None,  # Clear in-progress
-        "score": score,
-        "submitted_at": datetime.utcnow()
-    }
+    # Calculate score against the answer key
+    user_id = ObjectId(current_employee["sub"])
+    correct_answers, score = grade_submission(quiz, submission_data.answers)
     
-    await db.quiz_submissions.update_one(
-        {
-            "user_id": ObjectId(current_employee["sub"]),
-            "quiz_id": ObjectId(submission_data.quiz_id)
-        },
-        {"$set": submission_doc},
-        upsert=True
-    )
+    # The submission supersedes any buffered autosave
+    autosave_buffer.discard(user_id, quiz.quiz_id)
     
-    # Update assignment
-    pdf_id = quiz["pdf_id"]
-    await db.assignments.update_one(
-        {
-            "user_id": ObjectId(current_employee["sub"]),
-            "pdf_id": pdf_id
-        },
-        {
-            "$set": {
-                "is_quiz_completed": True,
-                "quiz_completed_at": datetime.utcnow()
-            }
-        }
-    )
+    # Save submission and complete the assignment; a repeated submit gets the stored result
+    stored, outcome = await submissions.submit(db, user_id, quiz, submission_data.answers, correct_answers, score)
+    total_questions = stored.get("total_questions", quiz.total_questions)
+    if stored.get("correct_answers") is not None:
+        correct_answers = stored["correct_answers"]
+    else:
+        # Submitted before correct answers were stored
+        correct_answers = round((stored.get("score") or 0) * total_questions / 100)
     
     return {
-        "message": "Quiz submitted successfully",
-        "score": score,
+        "message": "Quiz submitted successfully" if outcome == submissions.SUBMITTED else "Quiz already submitted",
+        "status": outcome,
+        "score": stored["score"],
         "correct_answers": correct_answers,
         "total_questions": total_questions
     }
 
 @router.get("/my_scores")
-async def get_my_scores(current_employee: dict = Depends(get_current_employee)):
+async def get_my_scores(
+    response: Response,
+    page: PageParams = Depends(page_params),
+    current_employee: dict = Depends(get_current_employee)
+):
     """Get employee's quiz scores"""
     db = get_database()
     
-    # Get all submissions for current user
-    submissions = await db.quiz_submissions.find({
-        "user_id": ObjectId(current_employee["sub"]),
-        "score": {"$ne": None}  # Only completed quizzes
-    }).to_list(length=100)
-    
-    # Get detailed score info
-    scores = []
-    for submission in submissions:
-        quiz = await db.quizzes.find_one({"_id": submission["quiz_id"]})
-        if quiz:
-            pdf = await db.pdf_documents.find_one({"_id": quiz["pdf_id"]})
-            if pdf:
-                scores.append({
-                    "pdf_title": pdf["title"],
-                    "score": submission["score"],
-                    "submitted_at": submission["submitted_at"],
-                    "total_questions": len(quiz["questions_json"])
-                })
-    
-    return scores 
\ No newline at end of file
+    # Completed submissions joined with quiz and PDF in a single aggregation
+    scores, next_cursor = await get_employee_scores(db, ObjectId(current_employee["sub"]), page)
+    set_next_cursor(response, next_cursor)
+    
+    return scores
\ No newline at end of file
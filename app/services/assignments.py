@@ -0,0 +1,81 @@
+from datetime import datetime
+from typing import Dict, List
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from ..core.config import settings
+from . import progress
+
+# Bulk assignment of PDFs to users.
+#
+# Both paths rely on the unique (user_id, pdf_id) index on `assignments`:
+# existing assignments are left untouched and concurrent requests cannot
+# create duplicates. Only newly inserted assignments are counted in the
+# progress counters.
+
+DUPLICATE_KEY_ERROR = 11000
+
+def _new_assignment_fields(now: datetime) -> Dict:
+    return {
+        "is_read": False,
+        "is_quiz_completed": False,
+        "created_at": now
+    }
+
+async def assign_to_users(db, pdf_id: ObjectId, user_ids: List[ObjectId]) -> Dict[str, int]:
+    """Upsert assignments for explicit user ids in unordered chunks"""
+    unique_ids = list(dict.fromkeys(user_ids))
+    now = datetime.utcnow()
+    inserted_ids = []
+
+    for start in range(0, len(unique_ids), settings.ASSIGNMENT_BATCH_SIZE):
+        chunk = unique_ids[start:start + settings.ASSIGNMENT_BATCH_SIZE]
+        operations = [
+            UpdateOne(
+                {"user_id": user_id, "pdf_id": pdf_id},
+                {"$setOnInsert": _new_assignment_fields(now)},
+                upsert=True
+            )
+            for user_id in chunk
+        ]
+        try:
+            result = await db.assignments.bulk_write(operations, ordered=False)
+            upserted = result.upserted_ids.keys()
+        except BulkWriteError as e:
+            # A concurrent request inserted some of the same pairs first
+            errors = e.details.get("writeErrors", [])
+            if any(error["code"] != DUPLICATE_KEY_ERROR for error in errors):
+                raise
+            upserted = [item["index"] for item in e.details.get("upserted", [])]
+        inserted_ids.extend(chunk[index] for index in upserted)
+
+    await progress.record_assigned(db, pdf_id, inserted_ids)
+    return {"inserted": len(inserted_ids), "skipped": len(user_ids) - len(inserted_ids)}
+
+async def assign_to_role(db, pdf_id: ObjectId, role: str) -> Dict[str, int]:
+    """Assign to every user with `role` server-side, without loading user ids"""
+    batch_id = ObjectId()
+    now = datetime.utcnow()
+    fields = {key: {"$literal": value} for key, value in _new_assignment_fields(now).items()}
+
+    await db.users.aggregate([
+        {"$match": {"role": role}},
+        {"$project": {
+            "_id": 0,
+            "user_id": "$_id",
+            "pdf_id": {"$literal": pdf_id},
+            "batch_id": {"$literal": batch_id},
+            **fields
+        }},
+        {"$merge": {
+            "into": "assignments",
+            "on": ["user_id", "pdf_id"],
+            "whenMatched": "keepExisting",
+            "whenNotMatched": "insert"
+        }}
+    ]).to_list(length=None)
+
+    targeted = await db.users.count_documents({"role": role})
+    inserted = await db.assignments.count_documents({"pdf_id": pdf_id, "batch_id": batch_id})
+    await progress.record_assigned_batch(db, pdf_id, batch_id, inserted)
+    return {"inserted": inserted, "skipped": targeted - inserted}
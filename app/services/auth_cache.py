@@ -0,0 +1,100 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from bson import ObjectId
+from ..core.config import settings
+from ..core.db import get_database
+
+class TTLCache:
+    """Bounded LRU mapping whose entries expire at a per-entry wall-clock deadline"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        cached = self._entries.get(key)
+        if not cached:
+            return None
+        expires_at, value = cached
+        if expires_at <= time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, expires_at: float):
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def pop(self, key: str):
+        self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+def token_key(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+class AuthCache:
+    """Per-process cache of verified JWT payloads and user profiles.
+
+    Payloads are kept until the earlier of AUTH_CACHE_TTL_SECONDS and the
+    token's own `exp`, so a cached token never outlives its signature.
+    Logout and role changes are enforced by the revocation list, which is
+    shared through Mongo.
+    """
+
+    def __init__(self, max_entries: int = settings.AUTH_CACHE_MAX_ENTRIES, ttl_seconds: int = settings.AUTH_CACHE_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._payloads = TTLCache(max_entries)
+        self._users = TTLCache(max_entries)
+        self.stats = {"payload_hits": 0, "payload_misses": 0, "user_hits": 0, "user_misses": 0, "invalidations": 0}
+
+    def get_payload(self, token: str) -> Optional[Dict[str, Any]]:
+        payload = self._payloads.get(token_key(token))
+        self.stats["payload_hits" if payload else "payload_misses"] += 1
+        return payload
+
+    def set_payload(self, token: str, payload: Dict[str, Any]):
+        expires_at = min(time.time() + self.ttl_seconds, payload.get("exp", 0))
+        self._payloads.set(token_key(token), payload, expires_at)
+
+    async def get_user(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """User profile without the password hash, from cache or Mongo"""
+        user = self._users.get(user_id)
+        if user:
+            self.stats["user_hits"] += 1
+            return user
+
+        self.stats["user_misses"] += 1
+        user = await get_database().users.find_one({"_id": ObjectId(user_id)}, {"password_hash": 0})
+        if user:
+            self._users.set(user_id, user, time.time() + self.ttl_seconds)
+        return user
+
+    def invalidate_token(self, token: str):
+        """Logout: drop the cached payload"""
+        self._payloads.pop(token_key(token))
+        self.stats["invalidations"] += 1
+
+    def invalidate_user(self, user_id: str):
+        """Role or profile change: drop the cached profile"""
+        self._users.pop(user_id)
+        self.stats["invalidations"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        payload_lookups = self.stats["payload_hits"] + self.stats["payload_misses"]
+        user_lookups = self.stats["user_hits"] + self.stats["user_misses"]
+        return {
+            **self.stats,
+            "payload_entries": len(self._payloads),
+            "user_entries": len(self._users),
+            "payload_hit_rate": round(self.stats["payload_hits"] / payload_lookups, 3) if payload_lookups else None,
+            "user_hit_rate": round(self.stats["user_hits"] / user_lookups, 3) if user_lookups else None
+        }
+
+auth_cache = AuthCache()
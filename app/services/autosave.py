@@ -0,0 +1,141 @@
+import asyncio
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from ..core.config import settings
+from ..core.db import get_database
+from .submissions import open_for
+
+Key = Tuple[ObjectId, ObjectId]
+
+class AutosaveBuffer:
+    """Coalesces quiz progress autosaves per (user, quiz) before writing them.
+
+    Answers from repeated saves are merged in memory and written every
+    AUTOSAVE_FLUSH_SECONDS as one unordered bulk_write, with one
+    `in_progress_json.<question>` path per changed answer instead of
+    rewriting the whole map. A final flush runs on shutdown. Reads in this
+    process see pending answers, including a batch whose write is still in
+    flight, through `pending()`.
+    """
+
+    def __init__(self, flush_seconds: float = settings.AUTOSAVE_FLUSH_SECONDS, max_pending: int = settings.AUTOSAVE_MAX_PENDING):
+        self.flush_seconds = flush_seconds
+        self.max_pending = max_pending
+        self._pending: Dict[Key, Dict[str, Any]] = {}
+        # Quiz version the pending answers were given for
+        self._versions: Dict[Key, int] = {}
+        # The batch being written; readable until the write resolves
+        self._inflight: Dict[Key, Dict[str, Any]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+        self.stats = {"saves": 0, "coalesced": 0, "writes": 0, "flushes": 0, "errors": 0}
+
+    def save(self, user_id: ObjectId, quiz_id: ObjectId, version: int, answers: Dict[str, Any]):
+        key = (user_id, quiz_id)
+        self._versions[key] = max(version, self._versions.get(key, 0))
+        pending = self._pending.get(key)
+        if pending is None:
+            self._pending[key] = dict(answers)
+        else:
+            pending.update(answers)
+            self.stats["coalesced"] += 1
+        self.stats["saves"] += 1
+
+        if len(self._pending) >= self.max_pending:
+            # Don't let a burst grow the buffer until the next tick
+            asyncio.create_task(self.flush())
+
+    def pending(self, user_id: ObjectId, quiz_id: ObjectId) -> Dict[str, Any]:
+        key = (user_id, quiz_id)
+        return {**self._inflight.get(key, {}), **self._pending.get(key, {})}
+
+    def discard(self, user_id: ObjectId, quiz_id: ObjectId):
+        """Drop pending answers that a submission supersedes"""
+        self._pending.pop((user_id, quiz_id), None)
+        self._versions.pop((user_id, quiz_id), None)
+        self._inflight.pop((user_id, quiz_id), None)
+
+    async def flush(self):
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            batch, self._pending = self._pending, {}
+            versions, self._versions = self._versions, {}
+            self._inflight = dict(batch)
+            try:
+                await self._write(batch, versions)
+            finally:
+                self._inflight = {}
+
+    async def _write(self, batch: Dict[Key, Dict[str, Any]], versions: Dict[Key, int]):
+        now = datetime.utcnow()
+        updates = [
+            UpdateOne(
+                # Quizzes graded for this version don't match; the upsert then
+                # hits the unique index and the stale autosave is dropped.
+                # A graded submission of an earlier version is a retake.
+                {"user_id": user_id, "quiz_id": quiz_id, **open_for(versions[(user_id, quiz_id)])},
+                {
+                    "$set": {
+                        **{f"in_progress_json.{question}": answer for question, answer in answers.items()},
+                        "updated_at": now
+                    }
+                },
+                upsert=True
+            )
+            for (user_id, quiz_id), answers in batch.items()
+        ]
+
+        try:
+            await get_database().quiz_submissions.bulk_write(updates, ordered=False)
+        except BulkWriteError as e:
+            other_errors = [error for error in e.details.get("writeErrors", []) if error.get("code") != 11000]
+            if other_errors:
+                self.stats["errors"] += len(other_errors)
+                print(f"Autosave flush failed for {len(other_errors)} quizzes: {other_errors[0].get('errmsg')}")
+        except Exception as e:
+            # Put the answers back under anything saved since, and retry next tick
+            for key, answers in batch.items():
+                self._pending[key] = {**answers, **self._pending.get(key, {})}
+                self._versions[key] = max(versions[key], self._versions.get(key, 0))
+            self.stats["errors"] += 1
+            print(f"Autosave flush failed: {e}")
+            return
+
+        self.stats["writes"] += len(updates)
+        self.stats["flushes"] += 1
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_seconds)
+            await self.flush()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        if self._pending:
+            print(f"Autosave: {len(self._pending)} quizzes could not be saved on shutdown")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "pending": len(self._pending)}
+
+autosave_buffer = AutosaveBuffer()
+
+async def start_autosave():
+    autosave_buffer.start()
+
+async def stop_autosave():
+    await autosave_buffer.stop()
@@ -0,0 +1,100 @@
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+import numpy as np
+from pymongo import UpdateOne
+from ..core.config import settings
+from .quiz_cache import CachedQuiz, compile_quiz
+from . import progress
+
+# Vectorized quiz grading.
+#
+# A compiled quiz has an integer answer key (option index per question) and
+# responses are encoded the same way, so grading a batch of submissions is a
+# single (submissions x questions) comparison against the key.
+
+def key_array(quiz: CachedQuiz) -> np.ndarray:
+    return np.asarray(quiz.answer_key, dtype=np.int16)
+
+def encode_batch(quiz: CachedQuiz, responses: List[Dict[str, Any]]) -> np.ndarray:
+    """(len(responses), questions) matrix of chosen option indices"""
+    matrix = np.full((len(responses), quiz.total_questions), -2, dtype=np.int16)
+    for row, answers in enumerate(responses):
+        if answers:
+            matrix[row] = quiz.encode_answers(answers)
+    return matrix
+
+def score_batch(quiz: CachedQuiz, responses: List[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Correct-answer counts and percentage scores for a batch of responses"""
+    correct = (encode_batch(quiz, responses) == key_array(quiz)).sum(axis=1)
+    total = quiz.total_questions
+    scores = correct / total * 100.0 if total else np.zeros(len(responses))
+    return correct, scores
+
+def grade_submission(quiz: CachedQuiz, answers: Dict[str, Any]) -> Tuple[int, float]:
+    """Correct-answer count and percentage score for one submission"""
+    correct, scores = score_batch(quiz, [answers])
+    return int(correct[0]), float(scores[0])
+
+async def regrade_quiz(db, quiz_doc: Dict[str, Any], batch_size: int = settings.REGRADE_BATCH_SIZE) -> Dict[str, Any]:
+    """Re-score the graded submissions to the quiz's current questions, writing back only changed scores.
+
+    Submissions to questions since regenerated are left as they are: their
+    answers don't apply to the new questions.
+    """
+    quiz = compile_quiz(quiz_doc)
+    started = time.monotonic()
+    scanned = changed = 0
+
+    async def flush(batch: List[Dict[str, Any]]) -> int:
+        correct, scores = score_batch(quiz, [doc.get("responses_json") or {} for doc in batch])
+        now = datetime.utcnow()
+        changed_docs = [
+            (doc, int(count), float(score))
+            for doc, count, score in zip(batch, correct, scores)
+            if doc.get("score") is None or abs(doc["score"] - score) > 1e-9 or doc.get("correct_answers") != count
+        ]
+        if changed_docs:
+            await db.quiz_submissions.bulk_write([
+                UpdateOne(
+                    {"_id": doc["_id"]},
+                    {"$set": {
+                        "score": score,
+                        "correct_answers": count,
+                        "total_questions": quiz.total_questions,
+                        "quiz_version": quiz.version,
+                        "regraded_at": now
+                    }}
+                )
+                for doc, count, score in changed_docs
+            ], ordered=False)
+            await progress.record_regrade(db, quiz.pdf_id, {doc["user_id"]: score - doc["score"] for doc, _, score in changed_docs})
+        return len(changed_docs)
+
+    questions_version = quiz.questions_version
+    if questions_version == 0:
+        # Submitted before questions versions were recorded
+        questions_version = {"$in": [0, None]}
+    cursor = db.quiz_submissions.find(
+        {"quiz_id": quiz.quiz_id, "questions_version": questions_version, "score": {"$ne": None}},
+        {"user_id": 1, "responses_json": 1, "score": 1, "correct_answers": 1},
+        batch_size=batch_size
+    )
+    batch = []
+    async for doc in cursor:
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            scanned += len(batch)
+            changed += await flush(batch)
+            batch = []
+    if batch:
+        scanned += len(batch)
+        changed += await flush(batch)
+
+    return {
+        "quiz_id": str(quiz.quiz_id),
+        "version": quiz.version,
+        "scanned": scanned,
+        "changed": changed,
+        "duration_seconds": round(time.monotonic() - started, 3)
+    }
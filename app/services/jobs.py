@@ -0,0 +1,320 @@
+import asyncio
+import os
+import socket
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from bson import ObjectId
+from pymongo import ReturnDocument
+from ..core.config import settings
+from ..core.db import get_database
+from .llm_quiz_gen import get_quiz_generator
+from . import pdf_store, search, text_store
+from .quiz_cache import quiz_cache
+
+# Job states
+JOB_QUEUED = "queued"
+JOB_EXTRACTING = "extracting"
+JOB_GENERATING = "generating"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+ACTIVE_STATES = [JOB_EXTRACTING, JOB_GENERATING]
+
+# Job types
+JOB_PDF_UPLOAD = "pdf_upload"
+JOB_QUIZ_REGENERATE = "quiz_regenerate"
+
+class LocalJobQueue:
+    """In-process job queue; stands in for a message broker"""
+
+    def __init__(self):
+        self._queue: asyncio.Queue = asyncio.Queue()
+
+    async def put(self, job_id: str):
+        await self._queue.put(job_id)
+
+    async def get(self) -> str:
+        return await self._queue.get()
+
+    def task_done(self):
+        self._queue.task_done()
+
+    async def join(self):
+        await self._queue.join()
+
+class JobManager:
+    """Runs queued jobs on a pool of worker tasks, tracking state in the `jobs` collection"""
+
+    def __init__(self, queue=None, concurrency: int = settings.JOB_WORKERS):
+        self.queue = queue or LocalJobQueue()
+        self.concurrency = max(1, concurrency)
+        self._workers: List[asyncio.Task] = []
+        # Recorded on every claim so this process can hand its jobs back on shutdown
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{ObjectId()}"
+
+    async def start(self):
+        """Re-enqueue unfinished jobs and start the worker pool"""
+        await self._recover()
+        for n in range(self.concurrency):
+            self._workers.append(asyncio.create_task(self._worker(n)))
+        print(f"Started {self.concurrency} job workers")
+
+    async def stop(self):
+        """Cancel the worker pool and requeue the jobs it was running"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+        result = await get_database().jobs.update_many(
+            {"status": {"$in": ACTIVE_STATES}, "owner": self.owner},
+            {"$set": {"status": JOB_QUEUED, "updated_at": datetime.utcnow()}, "$unset": {"owner": ""}}
+        )
+        print(f"Stopped job workers, requeued {result.modified_count} interrupted jobs")
+
+    async def enqueue(self, job_type: str, payload: Dict[str, Any], created_by: Optional[ObjectId] = None) -> str:
+        """Persist a new job and hand it to the queue"""
+        db = get_database()
+        now = datetime.utcnow()
+        job_doc = {
+            "type": job_type,
+            "status": JOB_QUEUED,
+            "payload": payload,
+            "result": None,
+            "error": None,
+            "attempts": 0,
+            "created_by": created_by,
+            "created_at": now,
+            "updated_at": now
+        }
+        result = await db.jobs.insert_one(job_doc)
+        job_id = str(result.inserted_id)
+        await self.queue.put(job_id)
+        return job_id
+
+    async def _recover(self):
+        """Queue jobs left behind by a previous process"""
+        db = get_database()
+        stale_before = datetime.utcnow() - timedelta(seconds=settings.JOB_STALE_SECONDS)
+
+        # Jobs whose process died without stopping cleanly go back to the queue
+        # once they stop making progress
+        await db.jobs.update_many(
+            {"status": {"$in": ACTIVE_STATES}, "updated_at": {"$lt": stale_before}},
+            {"$set": {"status": JOB_QUEUED, "updated_at": datetime.utcnow()}}
+        )
+
+        async for job in db.jobs.find({"status": JOB_QUEUED}, {"_id": 1}).sort("created_at", 1):
+            await self.queue.put(str(job["_id"]))
+
+    async def _worker(self, n: int):
+        while True:
+            job_id = await self.queue.get()
+            try:
+                await self._run(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Job worker {n} crashed on job {job_id}: {e}")
+            finally:
+                self.queue.task_done()
+
+    async def _claim(self, job_id: str) -> Optional[dict]:
+        """Atomically move a queued job into its first stage so only one worker runs it"""
+        db = get_database()
+        return await db.jobs.find_one_and_update(
+            {"_id": ObjectId(job_id), "status": JOB_QUEUED},
+            {
+                "$set": {"status": JOB_EXTRACTING, "owner": self.owner, "updated_at": datetime.utcnow()},
+                "$inc": {"attempts": 1},
+                # A retry streams its own candidates
+                "$unset": {"partial_questions": ""}
+            },
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def _set_status(self, job_id: ObjectId, status: str, **fields):
+        db = get_database()
+        fields.update({"status": status, "updated_at": datetime.utcnow()})
+        await db.jobs.update_one({"_id": job_id}, {"$set": fields})
+
+    async def _run(self, job_id: str):
+        job = await self._claim(job_id)
+        if not job:
+            # Already claimed by another worker, or finished
+            return
+
+        handler = JOB_HANDLERS.get(job["type"])
+        try:
+            if handler is None:
+                raise ValueError(f"Unknown job type: {job['type']}")
+            result = await handler(self, job)
+            await self._set_status(job["_id"], JOB_DONE, result=result, finished_at=datetime.utcnow())
+        except Exception as e:
+            error = getattr(e, "detail", None) or str(e)
+            print(f"Job {job_id} failed: {error}")
+            await self._set_status(job["_id"], JOB_FAILED, error=error, finished_at=datetime.utcnow())
+
+async def create_pdf_records(payload: Dict[str, Any], uploaded_by: ObjectId, quiz_questions: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Insert the PDF document and its quiz"""
+    db = get_database()
+
+    pdf_doc = {
+        "title": payload["title"],
+        "description": payload["description"],
+        "file_url": pdf_store.content_key(payload["content_hash"]),
+        "content_hash": payload.get("content_hash"),
+        "uploaded_by": uploaded_by,
+        "created_at": datetime.utcnow()
+    }
+
+    pdf_result = await db.pdf_documents.insert_one(pdf_doc)
+    pdf_id = pdf_result.inserted_id
+
+    quiz_doc = {
+        "pdf_id": pdf_id,
+        "questions_json": quiz_questions,
+        "version": 1,
+        "created_at": datetime.utcnow()
+    }
+
+    quiz_result = await db.quizzes.insert_one(quiz_doc)
+
+    await _index_for_search(pdf_doc, quiz_questions)
+
+    return {
+        "pdf_id": str(pdf_id),
+        "quiz_id": str(quiz_result.inserted_id),
+        "questions_count": len(quiz_questions)
+    }
+
+async def _index_for_search(pdf: Dict[str, Any], quiz_questions: List[Dict[str, Any]], pages: Optional[List[str]] = None):
+    """Search indexing is best effort; the PDF and quiz are already saved"""
+    try:
+        await search.index_document(get_database(), pdf, quiz_questions, pages)
+    except Exception as e:
+        print(f"Search indexing failed for PDF {pdf['_id']}: {e}")
+
+async def _load_pages(content_hash: str) -> List[str]:
+    """Page text from the text store, extracting on the process pool on a miss"""
+    pages = await text_store.load_all_pages(content_hash)
+    if pages is None:
+        pages = await pdf_store.extract_pages(pdf_store.content_key(content_hash))
+        await pdf_store.cache_pages(content_hash, pages)
+    return pages
+
+async def _generate(manager: JobManager, job: dict, pages: List[str], use_cache: bool = True):
+    """Generate a quiz over the whole document, persisting candidates as they arrive"""
+    await manager._set_status(job["_id"], JOB_GENERATING)
+    quiz_generator = get_quiz_generator()
+
+    async def persist_partial(question: Dict[str, Any]):
+        # Candidates are stored as they stream in, before the reduce step
+        await get_database().jobs.update_one(
+            {"_id": job["_id"]},
+            {"$push": {"partial_questions": question}, "$set": {"updated_at": datetime.utcnow()}}
+        )
+
+    quiz_questions, generation_stats = await quiz_generator.generate_quiz(
+        pages, on_question=persist_partial, use_cache=use_cache
+    )
+
+    return quiz_questions, generation_stats
+
+async def _run_pdf_upload(manager: JobManager, job: dict) -> Dict[str, Any]:
+    """Extract text, generate a quiz and persist the PDF document and quiz"""
+    payload = job["payload"]
+    content_hash = payload["content_hash"]
+
+    try:
+        blob = await pdf_store.get_blob(content_hash)
+        quiz_questions = blob.get("quiz_questions") if blob else None
+        generation_stats = None
+
+        if not quiz_questions:
+            # Stage 1: extract text on the process pool, unless already stored
+            pages = await _load_pages(content_hash)
+
+            # Stage 2: generate quiz over the whole document
+            quiz_questions, generation_stats = await _generate(manager, job, pages)
+            await pdf_store.cache_quiz(content_hash, quiz_questions)
+
+        # Stage 3: persist PDF document and quiz
+        result = await create_pdf_records(payload, job["created_by"], quiz_questions)
+        result["generation_stats"] = generation_stats
+        return result
+    except Exception:
+        # No document will point at the stored file
+        await pdf_store.release(content_hash)
+        raise
+
+async def _run_quiz_regenerate(manager: JobManager, job: dict) -> Dict[str, Any]:
+    """Generate a fresh quiz for an existing PDF from its stored page text"""
+    db = get_database()
+    pdf = await db.pdf_documents.find_one({"_id": ObjectId(job["payload"]["pdf_id"])})
+    if not pdf:
+        raise ValueError("PDF not found")
+
+    # Stage 1: stored page text; PDFs uploaded before content hashing are re-extracted
+    content_hash = pdf.get("content_hash")
+    if content_hash:
+        pages = await _load_pages(content_hash)
+    else:
+        pages = await pdf_store.extract_pages(pdf_store.storage_key(pdf))
+
+    # Stage 2: generate, bypassing cached completions so the quiz actually changes
+    quiz_questions, generation_stats = await _generate(manager, job, pages, use_cache=False)
+    if content_hash:
+        await pdf_store.cache_quiz(content_hash, quiz_questions)
+
+    # Stage 3: replace the questions and bump the version
+    quiz = await db.quizzes.find_one_and_update(
+        {"pdf_id": pdf["_id"]},
+        {
+            "$set": {"questions_json": quiz_questions, "updated_at": datetime.utcnow()},
+            # Submissions to the previous questions are no longer regraded
+            "$inc": {"version": 1, "questions_version": 1},
+            "$setOnInsert": {"created_at": datetime.utcnow()}
+        },
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    quiz_cache.invalidate(pdf["_id"])
+
+    await _index_for_search(pdf, quiz_questions, pages)
+
+    return {
+        "pdf_id": str(pdf["_id"]),
+        "quiz_id": str(quiz["_id"]),
+        "version": quiz["version"],
+        "questions_count": len(quiz_questions),
+        "generation_stats": generation_stats
+    }
+
+JOB_HANDLERS = {
+    JOB_PDF_UPLOAD: _run_pdf_upload,
+    JOB_QUIZ_REGENERATE: _run_quiz_regenerate,
+}
+
+def serialize_job(job: dict) -> Dict[str, Any]:
+    """Convert a job document into an API response"""
+    return {
+        "job_id": str(job["_id"]),
+        "type": job["type"],
+        "status": job["status"],
+        "result": job.get("result"),
+        "error": job.get("error"),
+        "attempts": job.get("attempts", 0),
+        "partial_questions_count": len(job.get("partial_questions") or []),
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"],
+        "finished_at": job.get("finished_at")
+    }
+
+job_manager = JobManager()
+
+async def start_job_workers():
+    await job_manager.start()
+
+async def stop_job_workers():
+    await job_manager.stop()
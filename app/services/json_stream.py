@@ -0,0 +1,68 @@
+import json
+from typing import Any, List
+
+class IncrementalJSONArrayParser:
+    """Yields the elements of the first JSON array in a stream as soon as each one closes.
+
+    Text before the opening `[` (LLM preamble) is skipped. Each element is
+    decoded on its own, so one malformed element is counted and dropped
+    without losing the ones around it.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._start = None
+        self._depth = 0
+        self._in_array = False
+        self._in_string = False
+        self._escape = False
+        self.malformed = 0
+        self.done = False
+
+    def feed(self, text: str) -> List[Any]:
+        """Consume more text; return the elements completed by it"""
+        self._buffer += text
+        buf = self._buffer
+        items = []
+        i = self._pos
+        while i < len(buf) and not self.done:
+            ch = buf[i]
+            if not self._in_array:
+                if ch == "[":
+                    self._in_array = True
+            elif self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                if self._depth == 0:
+                    self._start = i
+                self._depth += 1
+            elif ch in "}]":
+                if self._depth == 0:
+                    # End of the top-level array
+                    if ch == "]":
+                        self.done = True
+                else:
+                    self._depth -= 1
+                    if self._depth == 0:
+                        try:
+                            items.append(json.loads(buf[self._start:i + 1]))
+                        except ValueError:
+                            self.malformed += 1
+                        self._start = None
+            i += 1
+
+        # Drop consumed text, keeping any element still being built
+        keep_from = self._start if self._start is not None else i
+        self._buffer = buf[keep_from:]
+        self._pos = i - keep_from
+        if self._start is not None:
+            self._start = 0
+        return items
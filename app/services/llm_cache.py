@@ -0,0 +1,86 @@
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from ..core.config import settings
+from ..core.db import get_database
+
+class LLMResponseCache:
+    """Two-tier cache of LLM completions keyed by rendered prompt and model parameters.
+
+    The in-memory LRU tier answers repeat prompts within a process; the
+    `llm_cache` collection (TTL-indexed on `created_at`) shares them across
+    restarts and replicas. Cache failures never fail a generation.
+    """
+
+    def __init__(self, max_entries: int = settings.LLM_CACHE_MAX_ENTRIES, ttl_seconds: int = settings.LLM_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self.stats = {"memory_hits": 0, "mongo_hits": 0, "misses": 0, "writes": 0, "errors": 0}
+
+    @staticmethod
+    def make_key(messages: List[Any], model: str, temperature: float) -> str:
+        rendered = [(message.type, message.content) for message in messages]
+        raw = json.dumps({"model": model, "temperature": temperature, "messages": rendered}, sort_keys=True)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _remember(self, key: str, entry: Dict[str, Any]):
+        self._memory[key] = (time.monotonic() + self.ttl_seconds, entry)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        cached = self._memory.get(key)
+        if cached:
+            expires_at, entry = cached
+            if expires_at > time.monotonic():
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return entry
+            del self._memory[key]
+
+        try:
+            doc = await get_database().llm_cache.find_one({"_id": key})
+        except Exception as e:
+            print(f"LLM cache read failed: {e}")
+            self.stats["errors"] += 1
+            doc = None
+
+        # The TTL monitor runs periodically, so check age here as well
+        if doc and (datetime.utcnow() - doc["created_at"]).total_seconds() < self.ttl_seconds:
+            entry = {"content": doc["content"], "usage": doc.get("usage")}
+            self._remember(key, entry)
+            self.stats["mongo_hits"] += 1
+            return entry
+
+        self.stats["misses"] += 1
+        return None
+
+    async def set(self, key: str, content: str, usage: Optional[Dict[str, Any]], model: str):
+        entry = {"content": content, "usage": usage}
+        self._remember(key, entry)
+        try:
+            await get_database().llm_cache.replace_one(
+                {"_id": key},
+                {"content": content, "usage": usage, "model": model, "created_at": datetime.utcnow()},
+                upsert=True
+            )
+            self.stats["writes"] += 1
+        except Exception as e:
+            print(f"LLM cache write failed: {e}")
+            self.stats["errors"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats["memory_hits"] + self.stats["mongo_hits"] + self.stats["misses"]
+        hits = self.stats["memory_hits"] + self.stats["mongo_hits"]
+        return {
+            **self.stats,
+            "memory_entries": len(self._memory),
+            "hit_rate": round(hits / lookups, 3) if lookups else None
+        }
+
+llm_cache = LLMResponseCache()
@@ -1,28 +1,19 @@
-import json
-from typing import List, Dict, Any
+import asyncio
+import math
+import random
+import re
+import time
+from typing import List, Dict, Any, Optional, Tuple, Callable, Awaitable
 from langchain_groq import ChatGroq
 from langchain_core.prompts import ChatPromptTemplate
 from ..core.config import settings
+from ..utils.rate_limit import TokenBucket
+from .text_chunking import chunk_pages, coverage_order
+from .llm_cache import llm_cache
+from .json_stream import IncrementalJSONArrayParser
 
-class LLMQuizGenerator:
-    def __init__(self):
-        # Initialize Groq LLM
-        self.llm = ChatGroq(
-            temperature=0.5,
-            model_name="llama3-70b-8192",
-            api_key=settings.GROQ_API_KEY
-        )
-    
-    async def generate_quiz_from_text(self, text: str, num_questions: int = 5) -> List[Dict[str, Any]]:
-        """Generate quiz questions from PDF text using Groq"""
-        
-        if not settings.GROQ_API_KEY:
-            # Fallback to mock quiz if no API key
-            return self._generate_mock_quiz(num_questions)
-        
-        try:
-            # Create prompt template for quiz generation
-            prompt_template = ChatPromptTemplate.from_template("""
+# Prompt template for quiz generation
+QUIZ_PROMPT = ChatPromptTemplate.from_template("""
             You are an educational quiz generator. Based on the following text, generate {num_questions} multiple choice questions.
             Each question should have 4 options (A, B, C, D) with only one correct answer.
             
@@ -40,60 +31,340 @@ class LLMQuizGenerator:
             Make sure the questions are relevant to the content and the correct answer is one of the options.
             Be concise and focus on key concepts from the text.
             """)
+
+# Awaited with each valid question as soon as it is parsed
+QuestionCallback = Callable[[Dict[str, Any]], Awaitable[None]]
+
+# Errors worth retrying: timeouts, rate limits and server-side failures
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+def _is_retryable(error: Exception) -> bool:
+    if isinstance(error, (asyncio.TimeoutError, ConnectionError)):
+        return True
+    status_code = getattr(error, "status_code", None)
+    if status_code is not None:
+        return status_code in RETRYABLE_STATUS_CODES
+    # Groq SDK connection and timeout errors carry no status code
+    name = type(error).__name__
+    return "Connection" in name or "Timeout" in name
+
+class LLMQuizGenerator:
+    """Long-lived Groq client with bounded concurrency, rate limiting and retries"""
+    
+    def __init__(
+        self,
+        model_name: str = "llama3-70b-8192",
+        temperature: float = 0.5,
+        max_concurrency: int = settings.LLM_MAX_CONCURRENCY,
+        requests_per_minute: float = settings.LLM_REQUESTS_PER_MINUTE,
+        max_retries: int = settings.LLM_MAX_RETRIES,
+        timeout: float = settings.LLM_TIMEOUT_SECONDS
+    ):
+        self.model_name = model_name
+        self.temperature = temperature
+        self.max_retries = max_retries
+        self.timeout = timeout
+        
+        # Initialize Groq LLM; retries are handled here rather than by the SDK
+        self.llm = ChatGroq(
+            temperature=temperature,
+            model_name=model_name,
+            api_key=settings.GROQ_API_KEY,
+            base_url=settings.GROQ_API_BASE or None,
+            max_retries=0
+        )
+        
+        self._semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        self._rate_limiter = TokenBucket(
+            rate=requests_per_minute / 60,
+            capacity=max(1, max_concurrency)
+        )
+    
+    async def _with_retries(self, make_call: Callable[[], Awaitable[Any]], salvage: Optional[Callable[[], bool]] = None) -> Any:
+        """Run an LLM call under the rate limiter and concurrency limit, with a
+        per-call timeout and exponential-backoff retries.
+        
+        If the call fails and `salvage()` is true (it already produced usable
+        output), the failure is not retried and None is returned.
+        """
+        for attempt in range(self.max_retries + 1):
+            await self._rate_limiter.acquire()
+            async with self._semaphore:
+                try:
+                    return await asyncio.wait_for(make_call(), self.timeout)
+                except Exception as e:
+                    if salvage is not None and salvage():
+                        print(f"Groq call failed ({type(e).__name__}: {e}), keeping partial output")
+                        return None
+                    if attempt == self.max_retries or not _is_retryable(e):
+                        raise
+                    error = e
             
-            # Limit text length for API efficiency
-            limited_text = text[:3000] if len(text) > 3000 else text
-            
-            # Create the chain
-            chain = prompt_template | self.llm
+            # Back off outside the semaphore so other calls can proceed
+            delay = settings.LLM_RETRY_BASE_DELAY * (2 ** attempt) * (1 + random.random())
+            print(f"Groq call failed ({type(error).__name__}: {error}), retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+    
+    async def _invoke(self, messages) -> Any:
+        """Call the LLM and wait for the whole completion"""
+        return await self._with_retries(lambda: self.llm.ainvoke(messages))
+    
+    async def _stream_questions(
+        self,
+        messages,
+        num_questions: int,
+        on_question: Optional[QuestionCallback]
+    ) -> Tuple[str, List[Dict[str, Any]], Dict[str, int], bool]:
+        """Stream a completion, keeping each question as soon as it is complete and valid.
+        
+        Returns the raw content, the questions, token usage and whether the
+        stream finished; questions received before a failure are kept.
+        """
+        questions: List[Dict[str, Any]] = []
+        content_parts: List[str] = []
+        usage = {"input_tokens": 0, "output_tokens": 0, "total_tokens": 0}
+        
+        async def consume() -> bool:
+            parser = IncrementalJSONArrayParser()
+            content_parts.clear()
+            async for chunk in self.llm.astream(messages):
+                content_parts.append(chunk.content)
+                for key, value in self._extract_usage(chunk).items():
+                    usage[key] += value
+                for item in parser.feed(chunk.content):
+                    if self._is_valid_question(item) and len(questions) < num_questions:
+                        questions.append(item)
+                        if on_question:
+                            await on_question(item)
+            if parser.malformed:
+                print(f"Dropped {parser.malformed} malformed question(s) from stream")
+            return True
+        
+        finished = await self._with_retries(consume, salvage=lambda: bool(questions))
+        return "".join(content_parts), questions, usage, bool(finished)
+    
+    async def generate_quiz_from_text(self, text: str, num_questions: int = 5) -> List[Dict[str, Any]]:
+        """Generate quiz questions from PDF text using Groq"""
+        questions, _ = await self.generate_quiz([text], num_questions)
+        return questions
+    
+    async def generate_quiz(
+        self,
+        pages: List[str],
+        num_questions: int = 5,
+        on_question: Optional[QuestionCallback] = None,
+        use_cache: bool = True
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """Generate quiz questions covering the whole document.
+        
+        Map: the pages are split into token-budgeted chunks and candidate
+        questions are generated for each chunk concurrently. Reduce: candidates
+        are deduplicated and sampled down to `num_questions`, spread across the
+        document. `on_question` is awaited with each candidate as it arrives;
+        `use_cache=False` skips cached completions (regeneration). Returns the
+        questions and the run's latency/token stats.
+        """
+        started = time.perf_counter()
+        stats = {
+            "model": self.model_name,
+            "streaming": settings.LLM_STREAMING,
+            "chunks": 0,
+            "chunks_used": 0,
+            "llm_calls": 0,
+            "topup_calls": 0,
+            "cache_hits": 0,
+            "failed_calls": 0,
+            "candidates": 0,
+            "input_tokens": 0,
+            "output_tokens": 0,
+            "total_tokens": 0,
+            "time_to_first_question_ms": None,
+            "mock": False
+        }
+        
+        if not settings.GROQ_API_KEY:
+            # Fallback to mock quiz if no API key
+            stats["mock"] = True
+            return self._generate_mock_quiz(num_questions), self._finish_stats(stats, started)
+        
+        async def record_question(question: Dict[str, Any]):
+            if stats["time_to_first_question_ms"] is None:
+                stats["time_to_first_question_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            if on_question:
+                await on_question(question)
+        
+        chunks = chunk_pages(pages, settings.LLM_CHUNK_TOKENS)
+        stats["chunks"] = len(chunks)
+        
+        # Bound token spend on long documents with evenly spaced chunks
+        order = coverage_order(len(chunks), settings.LLM_MAX_CHUNKS)
+        selected = sorted(order[:settings.LLM_MAX_CHUNKS])
+        stats["chunks_used"] = len(selected)
+        
+        per_chunk = max(1, math.ceil(num_questions * settings.LLM_CANDIDATE_FACTOR / max(1, len(selected))))
+        candidates = await asyncio.gather(*[
+            self._generate_candidates(chunks[i]["text"], per_chunk, stats, record_question, use_cache)
+            for i in selected
+        ])
+        questions = self._reduce_candidates(candidates, num_questions)
+        
+        # Too few distinct questions: ask for just the missing ones
+        for attempt in range(min(settings.LLM_TOPUP_ATTEMPTS, len(selected))):
+            missing = num_questions - len(questions)
+            if missing <= 0:
+                break
+            chunk = chunks[selected[coverage_order(len(selected), len(selected))[attempt]]]
+            stats["topup_calls"] += 1
+            extra = await self._request_questions(chunk["text"], missing, stats, record_question, use_cache=False)
+            candidates.append(extra or [])
+            questions = self._reduce_candidates(candidates, num_questions)
+        
+        stats["candidates"] = sum(len(c) for c in candidates)
+        
+        if not questions:
+            print(f"No valid quiz questions generated, using fallback")
+            stats["mock"] = True
+            questions = self._generate_mock_quiz(num_questions)
+        
+        stats = self._finish_stats(stats, started)
+        print(f"Quiz generation stats: {stats}")
+        return questions, stats
+    
+    async def _generate_candidates(
+        self,
+        text: str,
+        num_questions: int,
+        stats: Dict[str, Any],
+        on_question: Optional[QuestionCallback] = None,
+        use_cache: bool = True
+    ) -> List[Dict[str, Any]]:
+        """Map step: candidate questions for one chunk; failures yield none"""
+        questions = await self._request_questions(text, num_questions, stats, on_question, use_cache)
+        if questions is None:
+            return []
+        
+        # Regenerate only the questions that were malformed or cut off
+        for _ in range(settings.LLM_TOPUP_ATTEMPTS):
+            missing = num_questions - len(questions)
+            if missing <= 0:
+                break
+            stats["topup_calls"] += 1
+            extra = await self._request_questions(text, missing, stats, on_question, use_cache=False)
+            if not extra:
+                break
+            questions.extend(extra)
+        return questions
+    
+    async def _request_questions(
+        self,
+        text: str,
+        num_questions: int,
+        stats: Dict[str, Any],
+        on_question: Optional[QuestionCallback] = None,
+        use_cache: bool = True
+    ) -> Optional[List[Dict[str, Any]]]:
+        """One generation request; returns the valid questions, or None if the call failed"""
+        try:
+            messages = QUIZ_PROMPT.format_messages(text=text, num_questions=num_questions)
             
-            # Generate quiz
-            response = chain.invoke({
-                "text": limited_text,
-                "num_questions": num_questions
-            })
+            # Identical prompt and model parameters are served from the cache
+            cache_key = llm_cache.make_key(messages, self.model_name, self.temperature)
+            if use_cache:
+                cached = await llm_cache.get(cache_key)
+                if cached is not None:
+                    stats["cache_hits"] += 1
+                    questions = self._parse_questions(cached["content"], num_questions)
+                    if on_question:
+                        for question in questions:
+                            await on_question(question)
+                    return questions
             
-            # Parse the response
-            content = response.content
+            stats["llm_calls"] += 1
+            if settings.LLM_STREAMING:
+                content, questions, usage, finished = await self._stream_questions(messages, num_questions, on_question)
+            else:
+                response = await self._invoke(messages)
+                content = response.content
+                usage = self._extract_usage(response)
+                finished = True
+                questions = self._parse_questions(content, num_questions)
+                if on_question:
+                    for question in questions:
+                        await on_question(question)
             
-            # Try to extract JSON from the response
-            try:
-                # Look for JSON array in the response
-                start_idx = content.find('[')
-                end_idx = content.rfind(']') + 1
-                
-                if start_idx != -1 and end_idx != -1:
-                    json_str = content[start_idx:end_idx]
-                    questions = json.loads(json_str)
-                else:
-                    # If no JSON array found, try to parse the entire response
-                    questions = json.loads(content)
-                
-                # Validate the structure
-                if isinstance(questions, list) and len(questions) > 0:
-                    # Ensure each question has the required fields
-                    validated_questions = []
-                    for q in questions:
-                        if isinstance(q, dict) and 'question' in q and 'options' in q and 'answer' in q:
-                            if isinstance(q['options'], list) and len(q['options']) == 4:
-                                validated_questions.append(q)
-                    
-                    if validated_questions:
-                        return validated_questions[:num_questions]
-                
-                # If validation fails, fall back to mock quiz
-                print(f"Invalid quiz structure generated, using fallback")
-                return self._generate_mock_quiz(num_questions)
-                
-            except json.JSONDecodeError as e:
-                print(f"Error parsing JSON response: {e}")
-                print(f"Response content: {content}")
-                return self._generate_mock_quiz(num_questions)
+            for key, value in usage.items():
+                stats[key] += value
             
+            # Only cache complete completions where every question was usable
+            if finished and len(questions) == num_questions:
+                await llm_cache.set(cache_key, content, usage, self.model_name)
+            return questions
         except Exception as e:
             print(f"Error generating quiz with Groq: {e}")
-            # Fallback to mock quiz
-            return self._generate_mock_quiz(num_questions)
+            stats["failed_calls"] += 1
+            return None
+    
+    @staticmethod
+    def _reduce_candidates(candidates: List[List[Dict[str, Any]]], num_questions: int) -> List[Dict[str, Any]]:
+        """Reduce step: drop duplicate questions and pick round-robin across
+        chunks, evenly spaced chunks first, for coverage of the document"""
+        queues = [list(chunk_candidates) for chunk_candidates in candidates]
+        order = coverage_order(len(queues), num_questions)
+        seen = set()
+        selected = []
+        while len(selected) < num_questions and any(queues):
+            for i in order:
+                while queues[i]:
+                    question = queues[i].pop(0)
+                    key = re.sub(r"[^a-z0-9]+", " ", question["question"].lower()).strip()
+                    if key not in seen:
+                        seen.add(key)
+                        selected.append(question)
+                        break
+                if len(selected) == num_questions:
+                    break
+        return selected
+    
+    @staticmethod
+    def _extract_usage(response: Any) -> Dict[str, int]:
+        usage = getattr(response, "usage_metadata", None)
+        if not usage:
+            token_usage = getattr(response, "response_metadata", {}).get("token_usage", {})
+            usage = {
+                "input_tokens": token_usage.get("prompt_tokens", 0),
+                "output_tokens": token_usage.get("completion_tokens", 0),
+                "total_tokens": token_usage.get("total_tokens", 0)
+            }
+        return {key: usage.get(key, 0) or 0 for key in ("input_tokens", "output_tokens", "total_tokens")}
+    
+    @staticmethod
+    def _finish_stats(stats: Dict[str, Any], started: float) -> Dict[str, Any]:
+        stats["latency_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        return stats
+    
+    def _parse_questions(self, content: str, num_questions: int) -> List[Dict[str, Any]]:
+        """Extract the valid questions from the JSON array in an LLM response.
+        
+        Each array element is parsed on its own, so a malformed question is
+        dropped without discarding the rest.
+        """
+        parser = IncrementalJSONArrayParser()
+        items = parser.feed(content)
+        if parser.malformed:
+            print(f"Dropped {parser.malformed} malformed question(s) from response")
+        
+        # Ensure each question has the required fields
+        validated_questions = [q for q in items if self._is_valid_question(q)]
+        return validated_questions[:num_questions]
+    
+    @staticmethod
+    def _is_valid_question(q: Any) -> bool:
+        return (
+            isinstance(q, dict) and 'question' in q and 'options' in q and 'answer' in q
+            and isinstance(q['options'], list) and len(q['options']) == 4
+            # An answer that isn't one of the options could never be graded correct
+            and isinstance(q['answer'], str) and q['answer'] in q['options']
+        )
     
     def _generate_mock_quiz(self, num_questions: int) -> List[Dict[str, Any]]:
         """Generate mock quiz questions for testing"""
@@ -125,4 +396,13 @@ class LLMQuizGenerator:
             }
         ]
         
-        return mock_questions[:num_questions] 
\ No newline at end of file
+        return mock_questions[:num_questions] 
+
+_quiz_generator: Optional[LLMQuizGenerator] = None
+
+def get_quiz_generator() -> LLMQuizGenerator:
+    """App-scoped generator shared by all requests and jobs"""
+    global _quiz_generator
+    if _quiz_generator is None:
+        _quiz_generator = LLMQuizGenerator()
+    return _quiz_generator
@@ -0,0 +1,152 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional
+from ..core.config import settings
+
+class PDFExtractionError(Exception):
+    """Raised when text extraction fails, times out or exceeds its memory cap"""
+
+def _limit_worker_memory(limit_mb: int):
+    """Process pool initializer: cap the address space of each worker"""
+    if limit_mb <= 0:
+        return
+    try:
+        import resource
+        limit = limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ImportError, ValueError, OSError) as e:
+        print(f"Could not apply extraction memory limit: {e}")
+
+def _count_pages(file_path: str) -> int:
+    import fitz  # PyMuPDF
+    with fitz.open(file_path) as doc:
+        return doc.page_count
+
+def _extract_page_range(file_path: str, start: int, end: int) -> List[str]:
+    """Extract the text of pages [start, end) in a worker process"""
+    import fitz  # PyMuPDF
+    with fitz.open(file_path) as doc:
+        return [doc[i].get_text() for i in range(start, end)]
+
+def _consume_result(future: asyncio.Future):
+    """Mark an abandoned future's outcome as retrieved"""
+    if not future.cancelled():
+        future.exception()
+
+class PDFExtractionService:
+    """Runs PyMuPDF text extraction on a process pool, off the event loop"""
+
+    def __init__(
+        self,
+        max_workers: int = settings.EXTRACTION_WORKERS,
+        pages_per_chunk: int = settings.EXTRACTION_PAGES_PER_CHUNK,
+        timeout: float = settings.EXTRACTION_TIMEOUT_SECONDS,
+        memory_limit_mb: int = settings.EXTRACTION_MEMORY_LIMIT_MB
+    ):
+        self.max_workers = max(1, max_workers)
+        self.pages_per_chunk = max(1, pages_per_chunk)
+        self.timeout = timeout
+        self.memory_limit_mb = memory_limit_mb
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def start(self):
+        if self._executor is None:
+            # Spawned workers don't inherit the event loop or Mongo client threads
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_limit_worker_memory,
+                initargs=(self.memory_limit_mb,)
+            )
+            print(f"Started PDF extraction pool with {self.max_workers} workers")
+
+    def stop(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            print("Stopped PDF extraction pool")
+
+    def _restart(self, executor: Optional[ProcessPoolExecutor], kill_workers: bool = False):
+        """Replace `executor` after one of its workers died (e.g. from the memory
+        cap) or, with `kill_workers`, got stuck past the timeout. A no-op when
+        another caller has already replaced it."""
+        if executor is None or self._executor is not executor:
+            return
+        self._executor = None
+        self.start()
+        if kill_workers:
+            # Cancelling the future doesn't stop a running parse; the worker
+            # would hold its slot until it finished or hit the memory cap
+            for process in list((getattr(executor, "_processes", None) or {}).values()):
+                process.kill()
+        # Other callers' futures are left alone: they fail with BrokenProcessPool
+        # and retry on the new pool
+        executor.shutdown(wait=False)
+
+    async def extract_pages(self, file_path: str) -> List[str]:
+        """Extract text per page, splitting large documents into page ranges across workers"""
+        for attempt in range(2):
+            if self._executor is None:
+                self.start()
+            executor = self._executor
+            try:
+                return await self._extract_on(executor, file_path)
+            except BrokenProcessPool:
+                if self._executor is not executor and attempt == 0:
+                    # Another extraction's timeout recycled the pool under this one
+                    continue
+                self._restart(executor)
+                raise PDFExtractionError("Extraction worker died, most likely from the memory limit")
+
+    async def _wait(self, future: asyncio.Future):
+        """Await pool work for at most the timeout, without cancelling it.
+
+        Killing the workers then fails it with BrokenProcessPool; cancelled
+        pool futures instead make the pool's manager thread crash on that
+        failure, leaving every other caller's work unresolved.
+        """
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), self.timeout)
+        except asyncio.TimeoutError:
+            future.add_done_callback(_consume_result)
+            raise
+
+    async def _extract_on(self, executor: ProcessPoolExecutor, file_path: str) -> List[str]:
+        loop = asyncio.get_running_loop()
+        futures = []
+        try:
+            page_count = await self._wait(loop.run_in_executor(executor, _count_pages, file_path))
+
+            for start in range(0, page_count, self.pages_per_chunk):
+                end = min(start + self.pages_per_chunk, page_count)
+                futures.append(loop.run_in_executor(executor, _extract_page_range, file_path, start, end))
+
+            # gather preserves submission order, so ranges reassemble in page order
+            ranges = await self._wait(asyncio.gather(*futures))
+        except asyncio.TimeoutError:
+            self._restart(executor, kill_workers=True)
+            raise PDFExtractionError(f"Text extraction timed out after {self.timeout}s")
+        except asyncio.CancelledError:
+            task = asyncio.current_task()
+            if task is not None and task.cancelling():
+                raise
+            # The pool cancelled the work (shutdown), not our caller
+            raise PDFExtractionError("Text extraction was cancelled")
+        except MemoryError:
+            raise PDFExtractionError(f"Text extraction exceeded {self.memory_limit_mb}MB memory limit")
+        except (BrokenProcessPool, PDFExtractionError):
+            raise
+        except Exception as e:
+            raise PDFExtractionError(f"Error extracting text from PDF: {str(e)}")
+
+        return [page for page_range in ranges for page in page_range]
+
+extraction_service = PDFExtractionService()
+
+async def start_extraction_service():
+    extraction_service.start()
+
+async def stop_extraction_service():
+    extraction_service.stop()
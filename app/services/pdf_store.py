@@ -0,0 +1,135 @@
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from fastapi import UploadFile, HTTPException, status
+from pymongo import ReturnDocument
+from ..core.config import settings
+from ..core.db import get_database
+from ..utils.file_upload import stream_upload_to_temp, remove_quietly
+from .pdf_extraction import extraction_service
+from .storage import get_storage
+from . import text_store
+
+# Content-addressed PDF storage.
+#
+# Files are stored once per SHA-256 in the upload storage backend, and `pdf_blobs` holds one
+# document per hash with a reference count plus the artifacts derived from the
+# bytes (extracted page text in the text store, generated quiz) so re-uploads
+# can reuse them.
+
+def content_key(content_hash: str) -> str:
+    return f"{content_hash}.pdf"
+
+def storage_key(pdf: Dict[str, Any]) -> str:
+    """Storage key of a PDF document's bytes"""
+    if pdf.get("content_hash"):
+        return content_key(pdf["content_hash"])
+    # Uploads from before content addressing were saved directly under UPLOAD_DIR
+    return os.path.relpath(pdf["file_url"], settings.UPLOAD_DIR)
+
+def document_url(pdf_id) -> str:
+    """Client-facing URL of a PDF document's bytes"""
+    return f"/documents/{pdf_id}"
+
+def document_etag(pdf: Dict[str, Any]) -> Optional[str]:
+    """Strong ETag for content-addressed PDFs; their bytes never change"""
+    content_hash = pdf.get("content_hash")
+    return f'"{content_hash}"' if content_hash else None
+
+async def store_upload(upload_file: UploadFile) -> Dict[str, Any]:
+    """Store an upload by content hash and take a reference on it"""
+    db = get_database()
+    temp_path, content_hash, size = await stream_upload_to_temp(upload_file)
+    key = content_key(content_hash)
+
+    # Take the reference before touching the file so a concurrent release
+    # cannot delete bytes we are about to point at
+    now = datetime.utcnow()
+    blob = await db.pdf_blobs.find_one_and_update(
+        {"_id": content_hash},
+        {
+            "$inc": {"ref_count": 1},
+            "$set": {"updated_at": now},
+            "$setOnInsert": {
+                "file_url": key,
+                "size": size,
+                "has_text": False,
+                "quiz_questions": None,
+                "created_at": now
+            }
+        },
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+
+    storage = get_storage()
+    try:
+        # Identical bytes may already be stored
+        if not await storage.exists(key):
+            await storage.put_file(key, temp_path)
+    except Exception:
+        await release(content_hash)
+        raise
+    finally:
+        remove_quietly(temp_path)
+
+    return blob
+
+async def get_blob(content_hash: str) -> Optional[Dict[str, Any]]:
+    db = get_database()
+    return await db.pdf_blobs.find_one({"_id": content_hash})
+
+async def release(content_hash: str):
+    """Drop a reference; remove the file and artifacts once nothing points at them"""
+    db = get_database()
+    blob = await db.pdf_blobs.find_one_and_update(
+        {"_id": content_hash},
+        {"$inc": {"ref_count": -1}, "$set": {"updated_at": datetime.utcnow()}},
+        return_document=ReturnDocument.AFTER
+    )
+    if not blob or blob["ref_count"] > 0:
+        return
+
+    result = await db.pdf_blobs.delete_one({"_id": content_hash, "ref_count": {"$lte": 0}})
+    if result.deleted_count:
+        await get_storage().delete(content_key(content_hash))
+        await text_store.delete(content_hash)
+        print(f"Removed unreferenced PDF {content_hash}")
+
+async def extract_pages(key: str) -> List[str]:
+    """Extract page text on the process pool from a stored PDF"""
+    async with get_storage().local_copy(key) as path:
+        return await extraction_service.extract_pages(path)
+
+async def cache_pages(content_hash: str, pages: List[str]):
+    """Store extracted page text in the page-indexed text store"""
+    db = get_database()
+    await text_store.write_pages(content_hash, pages)
+    await db.pdf_blobs.update_one({"_id": content_hash}, {"$set": {"has_text": True, "page_count": len(pages)}})
+
+async def cache_quiz(content_hash: str, questions: List[Dict[str, Any]]):
+    db = get_database()
+    await db.pdf_blobs.update_one({"_id": content_hash}, {"$set": {"quiz_questions": questions}})
+
+async def read_document_page(pdf: Dict[str, Any], page_number: int) -> Dict[str, Any]:
+    """Lazily load one page of a PDF document's stored text"""
+    content_hash = pdf.get("content_hash")
+    if not content_hash or not await text_store.has_pages(content_hash):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No extracted text available for this PDF"
+        )
+    
+    text, page_count = await text_store.read_page(content_hash, page_number)
+    if text is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Page not found"
+        )
+    
+    return {
+        "pdf_id": str(pdf["_id"]),
+        "page": page_number,
+        "page_count": page_count,
+        "text": text
+    }
@@ -0,0 +1,234 @@
+import asyncio
+import sys
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from bson import ObjectId
+from pymongo import UpdateOne
+from ..core.config import settings
+from ..core.db import get_database
+
+# Materialized progress counters.
+#
+# `pdf_progress` and `user_progress` hold one document per PDF / user, keyed
+# by its id, with the counters below. Writers keep them current with `$inc`
+# next to the assignment or submission change they count, so the admin
+# dashboards read totals with one point lookup instead of scanning
+# assignments. `rebuild` recomputes both collections from assignments and
+# submissions to reconcile any drift (e.g. a crash between two writes).
+
+PDF_PROGRESS = "pdf_progress"
+USER_PROGRESS = "user_progress"
+
+# Assignments, read assignments, completed quizzes, and the sum and count of
+# graded submission scores the average is derived from
+COUNTERS = ("assigned", "read", "completed", "score_total", "scored")
+
+def _inc(**deltas) -> Dict[str, Any]:
+    return {
+        "$inc": {field: delta for field, delta in deltas.items() if delta},
+        "$set": {"updated_at": datetime.utcnow()}
+    }
+
+def _merge_into(collection: str, when_not_matched: str = "insert") -> Dict[str, Any]:
+    """$merge stage adding the incoming counters to the stored ones"""
+    return {"$merge": {
+        "into": collection,
+        "on": "_id",
+        "whenMatched": [{"$set": {
+            **{
+                field: {"$add": [{"$ifNull": [f"${field}", 0]}, {"$ifNull": [f"$$new.{field}", 0]}]}
+                for field in COUNTERS
+            },
+            "updated_at": "$$new.updated_at"
+        }}],
+        "whenNotMatched": when_not_matched
+    }}
+
+async def _bump(db, pdf_id: ObjectId, user_id: ObjectId, **deltas):
+    update = _inc(**deltas)
+    if not update["$inc"]:
+        return
+    await db[PDF_PROGRESS].update_one({"_id": pdf_id}, update, upsert=True)
+    await db[USER_PROGRESS].update_one({"_id": user_id}, update, upsert=True)
+
+async def record_assigned(db, pdf_id: ObjectId, user_ids: List[ObjectId]):
+    """Count new assignments of a PDF to explicit users"""
+    if not user_ids:
+        return
+    await db[PDF_PROGRESS].update_one({"_id": pdf_id}, _inc(assigned=len(user_ids)), upsert=True)
+    for start in range(0, len(user_ids), settings.ASSIGNMENT_BATCH_SIZE):
+        chunk = user_ids[start:start + settings.ASSIGNMENT_BATCH_SIZE]
+        await db[USER_PROGRESS].bulk_write(
+            [UpdateOne({"_id": user_id}, _inc(assigned=1), upsert=True) for user_id in chunk],
+            ordered=False
+        )
+
+async def record_assigned_batch(db, pdf_id: ObjectId, batch_id: ObjectId, inserted: int):
+    """Count assignments inserted server-side under `batch_id`, without loading user ids"""
+    if not inserted:
+        return
+    await db[PDF_PROGRESS].update_one({"_id": pdf_id}, _inc(assigned=inserted), upsert=True)
+    await db.assignments.aggregate([
+        {"$match": {"pdf_id": pdf_id, "batch_id": batch_id}},
+        {"$project": {"_id": "$user_id", "assigned": {"$literal": 1}, "updated_at": {"$literal": datetime.utcnow()}}},
+        _merge_into(USER_PROGRESS)
+    ]).to_list(length=None)
+
+async def record_read(db, user_id: ObjectId, pdf_id: ObjectId):
+    await _bump(db, pdf_id, user_id, read=1)
+
+async def record_submission(db, user_id: ObjectId, pdf_id: ObjectId, score_delta: float, scored: bool, completed: bool):
+    """Count a change in graded score, a first graded submission (`scored`)
+    and/or a newly completed assignment"""
+    await _bump(
+        db, pdf_id, user_id,
+        completed=1 if completed else 0,
+        score_total=score_delta,
+        scored=1 if scored else 0
+    )
+
+async def record_regrade(db, pdf_id: ObjectId, score_deltas: Dict[ObjectId, float]):
+    """Apply per-user score changes from a regrade"""
+    score_deltas = {user_id: delta for user_id, delta in score_deltas.items() if delta}
+    if not score_deltas:
+        return
+    await db[PDF_PROGRESS].update_one({"_id": pdf_id}, _inc(score_total=sum(score_deltas.values())), upsert=True)
+    await db[USER_PROGRESS].bulk_write(
+        [UpdateOne({"_id": user_id}, _inc(score_total=delta), upsert=True) for user_id, delta in score_deltas.items()],
+        ordered=False
+    )
+
+async def remove_pdf(db, pdf_id: ObjectId, quiz_id: Optional[ObjectId]):
+    """Take a PDF's assignments and scores out of its users' counters; run before deleting them"""
+    now = datetime.utcnow()
+    await db.assignments.aggregate([
+        {"$match": {"pdf_id": pdf_id}},
+        {"$project": {
+            "_id": "$user_id",
+            "assigned": {"$literal": -1},
+            "read": {"$cond": ["$is_read", -1, 0]},
+            "completed": {"$cond": ["$is_quiz_completed", -1, 0]},
+            "updated_at": {"$literal": now}
+        }},
+        _merge_into(USER_PROGRESS, "discard")
+    ]).to_list(length=None)
+    if quiz_id:
+        await db.quiz_submissions.aggregate([
+            {"$match": {"quiz_id": quiz_id, "score": {"$ne": None}}},
+            {"$project": {
+                "_id": "$user_id",
+                "score_total": {"$multiply": ["$score", -1]},
+                "scored": {"$literal": -1},
+                "updated_at": {"$literal": now}
+            }},
+            _merge_into(USER_PROGRESS, "discard")
+        ]).to_list(length=None)
+    await db[PDF_PROGRESS].delete_one({"_id": pdf_id})
+
+def summarize(doc: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    doc = doc or {}
+    scored = doc.get("scored", 0)
+    return {
+        "total_assignments": doc.get("assigned", 0),
+        "read_count": doc.get("read", 0),
+        "completed_count": doc.get("completed", 0),
+        "average_score": round(doc.get("score_total", 0.0) / scored, 2) if scored else None
+    }
+
+async def get_pdf_progress(db, pdf_id: ObjectId) -> Dict[str, Any]:
+    return summarize(await db[PDF_PROGRESS].find_one({"_id": pdf_id}))
+
+async def get_user_progress(db, user_id: ObjectId) -> Dict[str, Any]:
+    return summarize(await db[USER_PROGRESS].find_one({"_id": user_id}))
+
+def _facts_pipeline() -> List[Dict[str, Any]]:
+    """One row per assignment and per graded submission, tagged with its PDF and user"""
+    return [
+        {"$project": {
+            "_id": 0,
+            "pdf": "$pdf_id",
+            "user": "$user_id",
+            "assigned": {"$literal": 1},
+            "read": {"$cond": ["$is_read", 1, 0]},
+            "completed": {"$cond": ["$is_quiz_completed", 1, 0]}
+        }},
+        {"$unionWith": {
+            "coll": "quiz_submissions",
+            "pipeline": [
+                {"$match": {"score": {"$ne": None}}},
+                {"$lookup": {"from": "quizzes", "localField": "quiz_id", "foreignField": "_id", "as": "quiz"}},
+                {"$unwind": "$quiz"},
+                {"$project": {"_id": 0, "pdf": "$quiz.pdf_id", "user": "$user_id", "score_total": "$score", "scored": {"$literal": 1}}}
+            ]
+        }}
+    ]
+
+async def _rebuild_collection(db, collection: str, group_by: str, started: datetime) -> Dict[str, int]:
+    await db.assignments.aggregate([
+        *_facts_pipeline(),
+        {"$group": {"_id": f"${group_by}", **{field: {"$sum": {"$ifNull": [f"${field}", 0]}} for field in COUNTERS}}},
+        {"$set": {"updated_at": {"$literal": started}}},
+        {"$merge": {"into": collection, "on": "_id", "whenMatched": "replace", "whenNotMatched": "insert"}}
+    ]).to_list(length=None)
+    # Counters not touched by the rebuild or a live update since have nothing left to count
+    removed = await db[collection].delete_many({"updated_at": {"$lt": started}})
+    return {"documents": await db[collection].count_documents({}), "removed": removed.deleted_count}
+
+async def rebuild(db) -> Dict[str, Any]:
+    """Recompute every counter from assignments and submissions.
+
+    Updates that land while a collection is being rebuilt can be
+    overwritten, so run it when traffic is low; running it again converges.
+    """
+    started = datetime.utcnow()
+    return {
+        "pdfs": await _rebuild_collection(db, PDF_PROGRESS, "pdf", started),
+        "users": await _rebuild_collection(db, USER_PROGRESS, "user", started)
+    }
+
+async def backfill_if_empty(db) -> Optional[Dict[str, Any]]:
+    """Build the counters for a deployment that has data but none yet"""
+    if await db[PDF_PROGRESS].find_one({}, {"_id": 1}) or await db[USER_PROGRESS].find_one({}, {"_id": 1}):
+        return None
+    if not await db.assignments.find_one({}, {"_id": 1}) and not await db.quiz_submissions.find_one({"score": {"$ne": None}}, {"_id": 1}):
+        return None
+    result = await rebuild(db)
+    print(f"Backfilled progress counters: {result}")
+    return result
+
+_backfill_task: Optional[asyncio.Task] = None
+
+async def _backfill_quietly(db):
+    try:
+        await backfill_if_empty(db)
+    except Exception as e:
+        print(f"Progress counter backfill failed: {e}")
+
+async def start_progress_backfill():
+    """Backfill in the background so a large library doesn't hold up startup"""
+    global _backfill_task
+    _backfill_task = asyncio.create_task(_backfill_quietly(get_database()))
+
+async def stop_progress_backfill():
+    if _backfill_task and not _backfill_task.done():
+        _backfill_task.cancel()
+        try:
+            await _backfill_task
+        except asyncio.CancelledError:
+            pass
+
+async def _main(argv: List[str]):
+    from ..core.db import connect_to_mongo, close_mongo_connection
+
+    await connect_to_mongo()
+    try:
+        if "--rebuild" in argv:
+            result = await rebuild(get_database())
+            print(f"Rebuilt progress counters: {result}")
+        else:
+            print("Usage: python -m app.services.progress --rebuild")
+    finally:
+        await close_mongo_connection()
+
+if __name__ == "__main__":
+    asyncio.run(_main(sys.argv[1:]))
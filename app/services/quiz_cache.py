@@ -0,0 +1,140 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+from bson import ObjectId
+from ..core.config import settings
+from ..core.db import get_database
+
+@dataclass
+class CachedQuiz:
+    """A quiz compiled for the employee endpoints"""
+    quiz_id: ObjectId
+    pdf_id: ObjectId
+    # Bumped by every change to the quiz, answer-key corrections included
+    version: int
+    # Bumped only when the questions are regenerated; quizzes from before it count as 0
+    questions_version: int
+    # Questions as employees see them, without `answer`
+    questions: List[Dict[str, Any]]
+    # Per question, the option text -> option index map used to encode responses
+    option_index: List[Dict[str, int]]
+    # Per question, the index of the correct option (-1 if the answer is not an option)
+    answer_key: List[int]
+    expires_at: float = 0.0
+
+    @property
+    def total_questions(self) -> int:
+        return len(self.answer_key)
+
+    def encode_answers(self, answers: Dict[str, Any]) -> List[int]:
+        """Option index chosen per question, -2 when unanswered or not an option"""
+        encoded = []
+        for i, options in enumerate(self.option_index):
+            answer = answers.get(str(i))
+            encoded.append(options.get(answer, -2) if isinstance(answer, str) else -2)
+        return encoded
+
+def compile_quiz(quiz: Dict[str, Any]) -> CachedQuiz:
+    questions, option_index, answer_key = [], [], []
+    for question in quiz["questions_json"]:
+        options = question.get("options", [])
+        index = {}
+        for i, option in enumerate(options):
+            index.setdefault(option, i)
+        option_index.append(index)
+        answer_key.append(index.get(question.get("answer"), -1))
+        questions.append({field: value for field, value in question.items() if field != "answer"})
+
+    return CachedQuiz(
+        quiz_id=quiz["_id"],
+        pdf_id=quiz["pdf_id"],
+        version=quiz.get("version", 1),
+        questions_version=quiz.get("questions_version", 0),
+        questions=questions,
+        option_index=option_index,
+        answer_key=answer_key
+    )
+
+class QuizCache:
+    """LRU of compiled quizzes, addressable by quiz id and by PDF id.
+
+    Regeneration in this process invalidates entries directly; the TTL
+    bounds how long another replica can serve a superseded version. A load
+    never replaces a newer cached version with an older one.
+    """
+
+    def __init__(self, max_entries: int = settings.QUIZ_CACHE_MAX_ENTRIES, ttl_seconds: int = settings.QUIZ_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._by_quiz: "OrderedDict[ObjectId, CachedQuiz]" = OrderedDict()
+        self._by_pdf: Dict[ObjectId, ObjectId] = {}
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def _lookup(self, quiz_id: Optional[ObjectId]) -> Optional[CachedQuiz]:
+        entry = self._by_quiz.get(quiz_id) if quiz_id else None
+        if entry and entry.expires_at > time.monotonic():
+            self._by_quiz.move_to_end(quiz_id)
+            self.stats["hits"] += 1
+            return entry
+        self.stats["misses"] += 1
+        return None
+
+    def _store(self, entry: CachedQuiz) -> CachedQuiz:
+        current = self._by_quiz.get(entry.quiz_id)
+        if current and current.version > entry.version:
+            return current
+        entry.expires_at = time.monotonic() + self.ttl_seconds
+        self._by_quiz[entry.quiz_id] = entry
+        self._by_quiz.move_to_end(entry.quiz_id)
+        self._by_pdf[entry.pdf_id] = entry.quiz_id
+        while len(self._by_quiz) > self.max_entries:
+            _, evicted = self._by_quiz.popitem(last=False)
+            self._by_pdf.pop(evicted.pdf_id, None)
+        return entry
+
+    async def get_by_id(self, quiz_id: ObjectId) -> Optional[CachedQuiz]:
+        entry = self._lookup(quiz_id)
+        if entry:
+            return entry
+        quiz = await get_database().quizzes.find_one({"_id": quiz_id})
+        return self._store(compile_quiz(quiz)) if quiz else None
+
+    async def get_current(self, quiz_id: ObjectId) -> Optional[CachedQuiz]:
+        """Like get_by_id, but confirms the cached version against Mongo first.
+
+        For grading: another replica may have corrected or regenerated the
+        quiz within the TTL, and a score graded against a stale key is stored.
+        """
+        entry = self._lookup(quiz_id)
+        if entry:
+            current = await get_database().quizzes.find_one({"_id": quiz_id}, {"version": 1})
+            if current and current.get("version", 1) == entry.version:
+                return entry
+            self.invalidate(entry.pdf_id)
+        quiz = await get_database().quizzes.find_one({"_id": quiz_id})
+        return self._store(compile_quiz(quiz)) if quiz else None
+
+    async def get_by_pdf(self, pdf_id: ObjectId) -> Optional[CachedQuiz]:
+        entry = self._lookup(self._by_pdf.get(pdf_id))
+        if entry:
+            return entry
+        quiz = await get_database().quizzes.find_one({"pdf_id": pdf_id})
+        return self._store(compile_quiz(quiz)) if quiz else None
+
+    def invalidate(self, pdf_id: ObjectId):
+        """Drop the quiz of a PDF after it is regenerated or deleted"""
+        quiz_id = self._by_pdf.pop(pdf_id, None)
+        if quiz_id:
+            self._by_quiz.pop(quiz_id, None)
+        self.stats["invalidations"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "entries": len(self._by_quiz),
+            "hit_rate": round(self.stats["hits"] / lookups, 3) if lookups else None
+        }
+
+quiz_cache = QuizCache()
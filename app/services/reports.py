@@ -0,0 +1,182 @@
+from typing import Any, Dict, List, Optional, Tuple
+from bson import ObjectId
+from ..utils.pagination import PageParams, keyset_stages, finish_page
+from . import pdf_store, progress
+
+# Aggregation pipelines behind the employee and admin progress views.
+# Each view is answered by a single server-side pipeline instead of one
+# find_one per row, and pages through rows by `_id` with keyset cursors.
+
+PAGE_ORDER = ["_id"]
+
+def _join(from_collection: str, local_field: str, as_field: str) -> List[Dict[str, Any]]:
+    """Left-join one document; rows whose target is gone keep an empty field
+    so the page cursor still advances past them"""
+    return [
+        {"$lookup": {
+            "from": from_collection,
+            "localField": local_field,
+            "foreignField": "_id",
+            "as": as_field
+        }},
+        {"$unwind": {"path": f"${as_field}", "preserveNullAndEmptyArrays": True}}
+    ]
+
+def employee_pdfs_pipeline(user_id: ObjectId, params: PageParams) -> List[Dict[str, Any]]:
+    """One page of a user's assignments joined with their PDF, quiz and submission score"""
+    return [
+        {"$match": {"user_id": user_id}},
+        *keyset_stages(params, PAGE_ORDER),
+        *_join("pdf_documents", "pdf_id", "pdf"),
+        {"$lookup": {
+            "from": "quizzes",
+            "let": {"pdf_id": "$pdf_id"},
+            "pipeline": [
+                {"$match": {"$expr": {"$eq": ["$pdf_id", "$$pdf_id"]}}},
+                {"$limit": 1},
+                {"$project": {"_id": 1}}
+            ],
+            "as": "quiz"
+        }},
+        {"$lookup": {
+            "from": "quiz_submissions",
+            "let": {"quiz_ids": "$quiz._id"},
+            "pipeline": [
+                {"$match": {"$expr": {"$and": [
+                    {"$eq": ["$user_id", user_id]},
+                    {"$in": ["$quiz_id", "$$quiz_ids"]}
+                ]}}},
+                {"$limit": 1},
+                {"$project": {"score": 1}}
+            ],
+            "as": "submission"
+        }},
+        {"$project": {
+            "has_pdf": {"$ifNull": ["$pdf._id", False]},
+            "pdf_id": "$pdf._id",
+            "title": "$pdf.title",
+            "description": {"$ifNull": ["$pdf.description", ""]},
+            "is_read": 1,
+            "read_at": 1,
+            "is_quiz_completed": 1,
+            "quiz_completed_at": 1,
+            "score": {"$ifNull": [{"$first": "$submission.score"}, None]}
+        }}
+    ]
+
+async def get_employee_pdfs(db, user_id: ObjectId, params: PageParams) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """One page of PDFs assigned to a user, in one round trip"""
+    rows = await db.assignments.aggregate(employee_pdfs_pipeline(user_id, params)).to_list(length=None)
+    rows, next_cursor = finish_page(rows, params, PAGE_ORDER)
+
+    pdfs = []
+    for row in rows:
+        # Assignments whose PDF no longer exists are skipped
+        if not row["has_pdf"]:
+            continue
+        pdfs.append({
+            "pdf_id": str(row["pdf_id"]),
+            "title": row["title"],
+            "description": row["description"],
+            "file_url": pdf_store.document_url(row["pdf_id"]),
+            "is_read": row["is_read"],
+            "read_at": row.get("read_at"),
+            "is_quiz_completed": row["is_quiz_completed"],
+            "quiz_completed_at": row.get("quiz_completed_at"),
+            "score": row["score"]
+        })
+    return pdfs, next_cursor
+
+def employee_scores_pipeline(user_id: ObjectId, params: PageParams) -> List[Dict[str, Any]]:
+    """One page of a user's graded submissions joined with their quiz and PDF"""
+    return [
+        {"$match": {"user_id": user_id, "score": {"$ne": None}}},
+        *keyset_stages(params, PAGE_ORDER),
+        *_join("quizzes", "quiz_id", "quiz"),
+        *_join("pdf_documents", "quiz.pdf_id", "pdf"),
+        {"$project": {
+            "has_pdf": {"$ifNull": ["$pdf._id", False]},
+            "pdf_title": "$pdf.title",
+            "score": 1,
+            "submitted_at": 1,
+            "total_questions": {"$size": {"$ifNull": ["$quiz.questions_json", []]}}
+        }}
+    ]
+
+async def get_employee_scores(db, user_id: ObjectId, params: PageParams) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """One page of a user's quiz scores, in one round trip"""
+    rows = await db.quiz_submissions.aggregate(employee_scores_pipeline(user_id, params)).to_list(length=None)
+    rows, next_cursor = finish_page(rows, params, PAGE_ORDER)
+
+    scores = [
+        {
+            "pdf_title": row["pdf_title"],
+            "score": row["score"],
+            "submitted_at": row["submitted_at"],
+            "total_questions": row["total_questions"]
+        }
+        for row in rows
+        if row["has_pdf"]
+    ]
+    return scores, next_cursor
+
+def progress_report_pipeline(match: Dict[str, Any], join: List[Dict[str, Any]], params: PageParams) -> List[Dict[str, Any]]:
+    """One page of matching assignments with joined detail"""
+    return [
+        {"$match": match},
+        *keyset_stages(params, PAGE_ORDER),
+        *join
+    ]
+
+async def _run_progress_report(db, match: Dict[str, Any], join: List[Dict[str, Any]], params: PageParams):
+    rows = await db.assignments.aggregate(progress_report_pipeline(match, join, params)).to_list(length=None)
+    return finish_page(rows, params, PAGE_ORDER)
+
+async def get_user_progress_report(db, user_id: ObjectId, params: PageParams) -> Dict[str, Any]:
+    """Totals for a user from their progress counters and one page of their assignments"""
+    rows, next_cursor = await _run_progress_report(
+        db,
+        {"user_id": user_id},
+        _join("pdf_documents", "pdf_id", "pdf"),
+        params
+    )
+    return {
+        **await progress.get_user_progress(db, user_id),
+        "assignments": [
+            {
+                "pdf_title": row["pdf"]["title"],
+                "is_read": row["is_read"],
+                "read_at": row.get("read_at"),
+                "is_quiz_completed": row["is_quiz_completed"],
+                "quiz_completed_at": row.get("quiz_completed_at")
+            }
+            for row in rows
+            if row.get("pdf")
+        ],
+        "next_cursor": next_cursor
+    }
+
+async def get_pdf_progress_report(db, pdf_id: ObjectId, params: PageParams) -> Dict[str, Any]:
+    """Totals for a PDF from its progress counters and one page of its assignees"""
+    rows, next_cursor = await _run_progress_report(
+        db,
+        {"pdf_id": pdf_id},
+        _join("users", "user_id", "user"),
+        params
+    )
+    return {
+        **await progress.get_pdf_progress(db, pdf_id),
+        "assignments": [
+            {
+                "user_name": row["user"]["name"],
+                "user_email": row["user"]["email"],
+                "is_read": row["is_read"],
+                "read_at": row.get("read_at"),
+                "is_quiz_completed": row["is_quiz_completed"],
+                "quiz_completed_at": row.get("quiz_completed_at")
+            }
+            for row in rows
+            if row.get("user")
+        ],
+        "next_cursor": next_cursor
+    }
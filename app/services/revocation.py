@@ -0,0 +1,151 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+from pymongo.errors import DuplicateKeyError
+from ..core.config import settings
+from ..core.db import get_database
+
+class RevocationList:
+    """Revoked token ids (`jti`), session families (`fam`), and per-user
+    cut-offs before which every token of a user is refused.
+
+    `revoked_tokens` in Mongo is the source of truth, and a TTL index on
+    `expires_at` drops entries once the token would have expired anyway.
+    Every process mirrors the live entries in memory and pulls new ones every
+    REVOCATION_SYNC_SECONDS, so checking a request costs a set lookup, not a
+    round trip. Revocations made in this process apply immediately; ones from
+    other replicas apply within one sync interval.
+    """
+
+    def __init__(self, sync_seconds: float = settings.REVOCATION_SYNC_SECONDS):
+        self.sync_seconds = sync_seconds
+        # id -> expiry as a Unix timestamp
+        self._revoked: Dict[str, float] = {}
+        # user id -> (`iat` cut-off, expiry), both as Unix timestamps
+        self._not_before: Dict[str, tuple] = {}
+        self._synced_until: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def is_revoked(self, token_id: Optional[str]) -> bool:
+        return token_id is not None and token_id in self._revoked
+
+    async def is_revoked_strict(self, token_id: str) -> bool:
+        """Also consult Mongo, for checks that must not miss another replica's revocation"""
+        if self.is_revoked(token_id):
+            return True
+        doc = await get_database().revoked_tokens.find_one({"_id": token_id}, {"expires_at": 1})
+        if doc:
+            self._remember(token_id, doc["expires_at"])
+        return doc is not None
+
+    def issued_before_cutoff(self, payload: Dict[str, Any]) -> bool:
+        """Whether the token was issued before its user's tokens were invalidated"""
+        cutoff = self._not_before.get(payload.get("sub"))
+        # Tokens without `iat` predate this check and count as old
+        return cutoff is not None and payload.get("iat", 0) < cutoff[0]
+
+    async def issued_before_cutoff_strict(self, payload: Dict[str, Any]) -> bool:
+        """Also consult Mongo, for checks that must not miss another replica's invalidation"""
+        user_id = payload.get("sub")
+        if user_id:
+            doc = await get_database().revoked_tokens.find_one({"_id": _user_entry_id(user_id)})
+            if doc:
+                self._remember_user(doc)
+        return self.issued_before_cutoff(payload)
+
+    def _remember(self, token_id: str, expires_at: datetime):
+        self._revoked[token_id] = _timestamp(expires_at)
+
+    def _remember_user(self, doc: Dict[str, Any]):
+        self._not_before[doc["user_id"]] = (_timestamp(doc["not_before"]), _timestamp(doc["expires_at"]))
+
+    def _remember_entry(self, doc: Dict[str, Any]):
+        if doc.get("not_before") is not None:
+            self._remember_user(doc)
+        else:
+            self._remember(doc["_id"], doc["expires_at"])
+
+    async def revoke(self, token_id: str, expires_at: datetime, reason: str = "logout") -> bool:
+        """Revoke until `expires_at`; False if it was already revoked"""
+        # Rotated refresh tokens are only checked through the insert below, so keep them out of memory
+        if reason != "rotated":
+            self._remember(token_id, expires_at)
+        try:
+            await get_database().revoked_tokens.insert_one({
+                "_id": token_id,
+                "expires_at": expires_at,
+                "reason": reason,
+                "revoked_at": datetime.utcnow()
+            })
+        except DuplicateKeyError:
+            return False
+        return True
+
+    async def revoke_user(self, user_id: str, reason: str = "role_change"):
+        """Refuse every token of the user issued before now, on all replicas and across restarts"""
+        now = datetime.utcnow()
+        doc = {
+            "_id": _user_entry_id(user_id),
+            "user_id": user_id,
+            # `iat` is floored to whole seconds, so round up: tokens from this second are refused too
+            "not_before": (now + timedelta(seconds=1)).replace(microsecond=0),
+            # Refresh tokens are the longest-lived tokens the cut-off has to cover
+            "expires_at": now + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+            "reason": reason,
+            "revoked_at": now
+        }
+        self._remember_user(doc)
+        await get_database().revoked_tokens.replace_one({"_id": doc["_id"]}, doc, upsert=True)
+
+    async def sync(self):
+        """Pull revocations recorded since the last sync and drop expired ones"""
+        query = {"expires_at": {"$gt": datetime.utcnow()}, "reason": {"$ne": "rotated"}}
+        if self._synced_until is not None:
+            query["revoked_at"] = {"$gte": self._synced_until}
+        started = datetime.utcnow()
+
+        async for doc in get_database().revoked_tokens.find(query, {"expires_at": 1, "user_id": 1, "not_before": 1}):
+            self._remember_entry(doc)
+        # Overlap the next window so inserts that raced this query aren't missed
+        self._synced_until = started - timedelta(seconds=5)
+
+        now = time.time()
+        self._revoked = {token_id: exp for token_id, exp in self._revoked.items() if exp > now}
+        self._not_before = {user_id: entry for user_id, entry in self._not_before.items() if entry[1] > now}
+
+    async def _sync_loop(self):
+        while True:
+            await asyncio.sleep(self.sync_seconds)
+            try:
+                await self.sync()
+            except Exception as e:
+                print(f"Revocation list sync failed: {e}")
+
+    async def start(self):
+        await self.sync()
+        self._task = asyncio.create_task(self._sync_loop())
+        print(f"Loaded {len(self._revoked)} revoked tokens")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+def _timestamp(value: datetime) -> float:
+    return (value - datetime(1970, 1, 1)).total_seconds()
+
+def _user_entry_id(user_id: str) -> str:
+    return f"user:{user_id}"
+
+revocation_list = RevocationList()
+
+async def start_revocation_sync():
+    await revocation_list.start()
+
+async def stop_revocation_sync():
+    await revocation_list.stop()
@@ -0,0 +1,144 @@
+import asyncio
+import re
+import sys
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from bson import ObjectId
+from ..core.config import settings
+from . import text_store
+
+# Full-text search over the PDF library.
+#
+# `search_index` holds one entry per title, extracted page and quiz question,
+# covered by a Mongo text index. Text scores are multiplied by a per-kind
+# boost, hits are grouped per PDF, and each result carries page-level
+# snippets built around the matched terms.
+
+KIND_TITLE = "title"
+KIND_PAGE = "page"
+KIND_QUESTION = "question"
+
+BOOSTS = {KIND_TITLE: 3.0, KIND_QUESTION: 2.0, KIND_PAGE: 1.0}
+
+def _entry(pdf_id: ObjectId, title: str, kind: str, text: str, page: Optional[int] = None) -> Dict[str, Any]:
+    return {
+        "pdf_id": pdf_id,
+        "title": title,
+        "kind": kind,
+        "page": page,
+        "text": text,
+        "boost": BOOSTS[kind],
+        "indexed_at": datetime.utcnow()
+    }
+
+def _question_entries(pdf_id: ObjectId, title: str, questions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [
+        _entry(pdf_id, title, KIND_QUESTION, " ".join([q["question"], *q.get("options", [])]))
+        for q in questions
+    ]
+
+async def index_document(db, pdf: Dict[str, Any], questions: List[Dict[str, Any]], pages: Optional[List[str]] = None):
+    """(Re)index a PDF's title, page text and quiz questions; pages default to the text store"""
+    pdf_id = pdf["_id"]
+    title = pdf["title"]
+    entries = [_entry(pdf_id, title, KIND_TITLE, f"{title} {pdf.get('description') or ''}".strip())]
+
+    content_hash = pdf.get("content_hash")
+    if pages is None and content_hash:
+        pages = await text_store.load_all_pages(content_hash)
+    for page_number, page in enumerate(pages or [], start=1):
+        if page.strip():
+            entries.append(_entry(pdf_id, title, KIND_PAGE, page, page_number))
+
+    entries.extend(_question_entries(pdf_id, title, questions))
+
+    await db.search_index.delete_many({"pdf_id": pdf_id})
+    if entries:
+        await db.search_index.insert_many(entries, ordered=False)
+
+async def remove_document(db, pdf_id: ObjectId):
+    await db.search_index.delete_many({"pdf_id": pdf_id})
+
+def _terms(query: str) -> List[str]:
+    return [term for term in re.findall(r"\w+", query.lower()) if len(term) > 1]
+
+def make_snippet(text: str, terms: List[str], width: int = settings.SEARCH_SNIPPET_CHARS) -> str:
+    """A window of `text` around the first matched term"""
+    lowered = text.lower()
+    positions = [pos for pos in (lowered.find(term) for term in terms) if pos != -1]
+    center = min(positions) if positions else 0
+    start = max(0, center - width // 2)
+    end = min(len(text), start + width)
+    snippet = re.sub(r"\s+", " ", text[start:end]).strip()
+    return f"{'…' if start > 0 else ''}{snippet}{'…' if end < len(text) else ''}"
+
+async def search(
+    db,
+    query: str,
+    pdf_ids: Optional[List[ObjectId]] = None,
+    limit: int = settings.SEARCH_RESULT_LIMIT
+) -> List[Dict[str, Any]]:
+    """Rank PDFs for `query`, optionally restricted to `pdf_ids`"""
+    match: Dict[str, Any] = {"$text": {"$search": query}}
+    if pdf_ids is not None:
+        match["pdf_id"] = {"$in": pdf_ids}
+
+    rows = await db.search_index.aggregate([
+        {"$match": match},
+        {"$addFields": {"score": {"$multiply": [{"$meta": "textScore"}, "$boost"]}}},
+        {"$sort": {"score": -1}},
+        # Bound the work on very common terms before grouping
+        {"$limit": settings.SEARCH_MAX_HITS},
+        {"$group": {
+            "_id": "$pdf_id",
+            "title": {"$first": "$title"},
+            "score": {"$sum": "$score"},
+            "hits": {"$push": {"kind": "$kind", "page": "$page", "text": "$text", "score": "$score"}}
+        }},
+        {"$sort": {"score": -1}},
+        {"$limit": limit},
+        {"$project": {"title": 1, "score": 1, "hits": {"$slice": ["$hits", settings.SEARCH_HITS_PER_PDF]}}}
+    ]).to_list(length=limit)
+
+    terms = _terms(query)
+    return [
+        {
+            "pdf_id": str(row["_id"]),
+            "title": row["title"],
+            "score": round(row["score"], 3),
+            "hits": [
+                {
+                    "kind": hit["kind"],
+                    "page": hit["page"],
+                    "snippet": make_snippet(hit["text"], terms)
+                }
+                for hit in row["hits"]
+            ]
+        }
+        for row in rows
+    ]
+
+async def reindex_all(db) -> int:
+    """Rebuild the index for every PDF; used to backfill existing libraries"""
+    count = 0
+    async for pdf in db.pdf_documents.find():
+        quiz = await db.quizzes.find_one({"pdf_id": pdf["_id"]}, {"questions_json": 1})
+        await index_document(db, pdf, quiz["questions_json"] if quiz else [])
+        count += 1
+    return count
+
+async def _main(argv: List[str]):
+    from ..core.db import connect_to_mongo, close_mongo_connection, get_database
+
+    await connect_to_mongo()
+    try:
+        if "--reindex" in argv:
+            count = await reindex_all(get_database())
+            print(f"Reindexed {count} PDFs")
+        else:
+            print("Usage: python -m app.services.search --reindex")
+    finally:
+        await close_mongo_connection()
+
+if __name__ == "__main__":
+    asyncio.run(_main(sys.argv[1:]))
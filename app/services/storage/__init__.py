@@ -0,0 +1,30 @@
+from typing import Optional
+from ...core.config import settings
+from .base import ObjectInfo, StorageBackend, StorageError
+
+# Upload storage, selected by STORAGE_BACKEND: "local" (default), "gridfs" or
+# "s3". Everything that reads or writes PDF bytes or stored page text goes
+# through get_storage() so API replicas can share one store.
+
+_storage: Optional[StorageBackend] = None
+
+def get_storage() -> StorageBackend:
+    """App-scoped storage backend"""
+    global _storage
+    if _storage is None:
+        backend = settings.STORAGE_BACKEND.lower()
+        if backend == "local":
+            from .local import LocalStorage
+            _storage = LocalStorage()
+        elif backend == "gridfs":
+            from .gridfs_backend import GridFSStorage
+            _storage = GridFSStorage()
+        elif backend == "s3":
+            from .s3 import S3Storage
+            _storage = S3Storage()
+        else:
+            raise StorageError(f"Unknown STORAGE_BACKEND: {settings.STORAGE_BACKEND}")
+        print(f"Using {_storage.name} upload storage")
+    return _storage
+
+__all__ = ["ObjectInfo", "StorageBackend", "StorageError", "get_storage"]
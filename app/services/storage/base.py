@@ -0,0 +1,77 @@
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional
+import aiofiles
+from ...core.config import settings
+
+class StorageError(Exception):
+    """Raised when a storage backend cannot complete an operation"""
+
+@dataclass
+class ObjectInfo:
+    size: int
+    modified: float  # Unix timestamp
+
+class StorageBackend(ABC):
+    """Interface every upload storage backend implements.
+
+    Keys are relative, slash-separated paths such as `<sha256>.pdf` or
+    `text/<sha256>.pages`. Reads are streamed in chunks and may start at any
+    byte offset, which is what document delivery and the page text store use.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    async def put_file(self, key: str, path: str):
+        """Store the local file at `path` under `key`; the backend may move it"""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def put_bytes(self, key: str, data: bytes):
+        raise NotImplementedError
+
+    @abstractmethod
+    async def stat(self, key: str) -> Optional[ObjectInfo]:
+        """Size and modification time, or None if `key` does not exist"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def iter_range(self, key: str, start: int = 0, length: Optional[int] = None) -> AsyncIterator[bytes]:
+        """Stream `length` bytes from `start` (to the end when length is None)"""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def delete(self, key: str):
+        """Remove `key`; missing keys are ignored"""
+        raise NotImplementedError
+
+    async def signed_url(self, key: str, expires_in: int, filename: Optional[str] = None) -> Optional[str]:
+        """A URL that serves `key` directly until it expires, if the backend has one"""
+        return None
+
+    async def exists(self, key: str) -> bool:
+        return await self.stat(key) is not None
+
+    async def read_range(self, key: str, start: int, length: int) -> bytes:
+        return b"".join([chunk async for chunk in self.iter_range(key, start, length)])
+
+    @asynccontextmanager
+    async def local_copy(self, key: str) -> AsyncIterator[str]:
+        """Path of a local file holding `key`, for tools that need a real file"""
+        os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=settings.UPLOAD_DIR, suffix=os.path.splitext(key)[1])
+        os.close(fd)
+        try:
+            async with aiofiles.open(temp_path, "wb") as f:
+                async for chunk in self.iter_range(key):
+                    await f.write(chunk)
+            yield temp_path
+        finally:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
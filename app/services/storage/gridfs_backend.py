@@ -0,0 +1,79 @@
+from datetime import timezone
+from typing import AsyncIterator, Optional
+import aiofiles
+from gridfs.errors import NoFile
+from motor.motor_asyncio import AsyncIOMotorGridFSBucket
+from ...core.config import settings
+from ...core.db import get_database
+from .base import ObjectInfo, StorageBackend, StorageError
+
+class GridFSStorage(StorageBackend):
+    """Objects in a GridFS bucket of the application database, keyed by `_id`"""
+
+    name = "gridfs"
+
+    def __init__(self, bucket_name: str = settings.GRIDFS_BUCKET):
+        self.bucket_name = bucket_name
+
+    @property
+    def _bucket(self) -> AsyncIOMotorGridFSBucket:
+        # The Mongo client only exists once the app has started
+        return AsyncIOMotorGridFSBucket(get_database(), bucket_name=self.bucket_name)
+
+    @property
+    def _files(self):
+        return get_database()[f"{self.bucket_name}.files"]
+
+    async def _upload(self, key: str, chunks: AsyncIterator[bytes]):
+        await self.delete(key)
+        grid_in = self._bucket.open_upload_stream_with_id(key, key)
+        try:
+            async for chunk in chunks:
+                await grid_in.write(chunk)
+        except Exception:
+            await grid_in.abort()
+            raise
+        await grid_in.close()
+
+    async def put_file(self, key: str, path: str):
+        async def read_file():
+            async with aiofiles.open(path, "rb") as f:
+                while chunk := await f.read(settings.UPLOAD_CHUNK_SIZE):
+                    yield chunk
+
+        await self._upload(key, read_file())
+
+    async def put_bytes(self, key: str, data: bytes):
+        async def single():
+            yield data
+
+        await self._upload(key, single())
+
+    async def stat(self, key: str) -> Optional[ObjectInfo]:
+        doc = await self._files.find_one({"_id": key}, {"length": 1, "uploadDate": 1})
+        if not doc:
+            return None
+        return ObjectInfo(size=doc["length"], modified=doc["uploadDate"].replace(tzinfo=timezone.utc).timestamp())
+
+    async def iter_range(self, key: str, start: int = 0, length: Optional[int] = None) -> AsyncIterator[bytes]:
+        try:
+            grid_out = await self._bucket.open_download_stream(key)
+        except NoFile:
+            raise StorageError(f"No such object: {key}")
+
+        grid_out.seek(start)
+        remaining = length
+        while remaining is None or remaining > 0:
+            size = settings.DOWNLOAD_CHUNK_SIZE if remaining is None else min(settings.DOWNLOAD_CHUNK_SIZE, remaining)
+            chunk = await grid_out.read(size)
+            if not chunk:
+                break
+            if remaining is not None:
+                remaining -= len(chunk)
+            yield chunk
+
+    async def delete(self, key: str):
+        try:
+            await self._bucket.delete(key)
+        except NoFile:
+            pass
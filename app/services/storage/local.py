@@ -0,0 +1,85 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+import aiofiles
+from ...core.config import settings
+from .base import ObjectInfo, StorageBackend, StorageError
+
+class LocalStorage(StorageBackend):
+    """Files under a local directory (UPLOAD_DIR); single-host deployments only"""
+
+    name = "local"
+
+    def __init__(self, root: str = settings.UPLOAD_DIR):
+        self.root = os.path.abspath(root)
+
+    def path(self, key: str) -> str:
+        path = os.path.abspath(os.path.join(self.root, key))
+        if os.path.commonpath([self.root, path]) != self.root:
+            raise StorageError(f"Key escapes the storage root: {key}")
+        return path
+
+    async def put_file(self, key: str, path: str):
+        target = self.path(key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        # Same filesystem as the upload temp dir, so this is an atomic rename
+        os.replace(path, target)
+
+    def _write(self, target: str, data: bytes):
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        temp_path = f"{target}.part"
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, target)
+
+    async def put_bytes(self, key: str, data: bytes):
+        await asyncio.to_thread(self._write, self.path(key), data)
+
+    async def stat(self, key: str) -> Optional[ObjectInfo]:
+        try:
+            result = os.stat(self.path(key))
+        except FileNotFoundError:
+            return None
+        return ObjectInfo(size=result.st_size, modified=result.st_mtime)
+
+    async def iter_range(self, key: str, start: int = 0, length: Optional[int] = None) -> AsyncIterator[bytes]:
+        try:
+            async with aiofiles.open(self.path(key), "rb") as f:
+                await f.seek(start)
+                remaining = length
+                while remaining is None or remaining > 0:
+                    size = settings.DOWNLOAD_CHUNK_SIZE if remaining is None else min(settings.DOWNLOAD_CHUNK_SIZE, remaining)
+                    chunk = await f.read(size)
+                    if not chunk:
+                        break
+                    if remaining is not None:
+                        remaining -= len(chunk)
+                    yield chunk
+        except FileNotFoundError:
+            raise StorageError(f"No such object: {key}")
+
+    def _read(self, path: str, start: int, length: int) -> bytes:
+        with open(path, "rb") as f:
+            f.seek(start)
+            return f.read(length)
+
+    async def read_range(self, key: str, start: int, length: int) -> bytes:
+        try:
+            return await asyncio.to_thread(self._read, self.path(key), start, length)
+        except FileNotFoundError:
+            raise StorageError(f"No such object: {key}")
+
+    async def delete(self, key: str):
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    @asynccontextmanager
+    async def local_copy(self, key: str) -> AsyncIterator[str]:
+        # Already on disk; no copy needed
+        path = self.path(key)
+        if not os.path.exists(path):
+            raise StorageError(f"No such object: {key}")
+        yield path
@@ -0,0 +1,94 @@
+import asyncio
+from typing import AsyncIterator, Optional
+from ...core.config import settings
+from .base import ObjectInfo, StorageBackend, StorageError
+
+class S3Storage(StorageBackend):
+    """Objects in an S3-compatible bucket (AWS, MinIO, a local moto server).
+
+    boto3 is blocking, so every call runs on a worker thread. Set
+    S3_ENDPOINT_URL to point at a local stand-in for testing.
+    """
+
+    name = "s3"
+
+    def __init__(
+        self,
+        bucket: str = settings.S3_BUCKET,
+        prefix: str = settings.S3_PREFIX,
+        endpoint_url: str = settings.S3_ENDPOINT_URL,
+        region: str = settings.S3_REGION
+    ):
+        try:
+            import boto3
+            from botocore.exceptions import ClientError
+        except ImportError:
+            raise StorageError("STORAGE_BACKEND=s3 requires boto3 (pip install boto3)")
+        if not bucket:
+            raise StorageError("S3_BUCKET is not set")
+
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self._client_error = ClientError
+        self._client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url or None,
+            region_name=region or None,
+            aws_access_key_id=settings.S3_ACCESS_KEY_ID or None,
+            aws_secret_access_key=settings.S3_SECRET_ACCESS_KEY or None
+        )
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def _is_missing(self, error: Exception) -> bool:
+        code = error.response.get("Error", {}).get("Code")
+        return code in ("404", "NoSuchKey", "NotFound")
+
+    async def put_file(self, key: str, path: str):
+        # upload_file streams from disk and switches to multipart for large files
+        await asyncio.to_thread(self._client.upload_file, path, self.bucket, self._key(key))
+
+    async def put_bytes(self, key: str, data: bytes):
+        await asyncio.to_thread(self._client.put_object, Bucket=self.bucket, Key=self._key(key), Body=data)
+
+    async def stat(self, key: str) -> Optional[ObjectInfo]:
+        try:
+            head = await asyncio.to_thread(self._client.head_object, Bucket=self.bucket, Key=self._key(key))
+        except self._client_error as e:
+            if self._is_missing(e):
+                return None
+            raise
+        return ObjectInfo(size=head["ContentLength"], modified=head["LastModified"].timestamp())
+
+    async def iter_range(self, key: str, start: int = 0, length: Optional[int] = None) -> AsyncIterator[bytes]:
+        if length == 0:
+            return
+        byte_range = f"bytes={start}-" if length is None else f"bytes={start}-{start + length - 1}"
+        try:
+            response = await asyncio.to_thread(
+                self._client.get_object, Bucket=self.bucket, Key=self._key(key), Range=byte_range
+            )
+        except self._client_error as e:
+            if self._is_missing(e):
+                raise StorageError(f"No such object: {key}")
+            raise
+
+        body = response["Body"]
+        try:
+            while chunk := await asyncio.to_thread(body.read, settings.DOWNLOAD_CHUNK_SIZE):
+                yield chunk
+        finally:
+            body.close()
+
+    async def delete(self, key: str):
+        await asyncio.to_thread(self._client.delete_object, Bucket=self.bucket, Key=self._key(key))
+
+    async def signed_url(self, key: str, expires_in: int, filename: Optional[str] = None) -> Optional[str]:
+        params = {"Bucket": self.bucket, "Key": self._key(key), "ResponseContentType": "application/pdf"}
+        if filename:
+            params["ResponseContentDisposition"] = f'inline; filename="{filename}"'
+        return await asyncio.to_thread(
+            self._client.generate_presigned_url, "get_object", Params=params, ExpiresIn=expires_in
+        )
+
@@ -0,0 +1,119 @@
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+from ..core.db import get_client, supports_transactions
+from .quiz_cache import CachedQuiz
+from . import progress
+
+# Quiz submission as one logical operation.
+#
+# A submission writes the graded quiz_submissions document and marks the
+# assignment completed. (user_id, quiz_id, quiz_version) is the idempotency
+# key: the submission is only written while no graded one exists for the
+# current version of the quiz, so the first request wins and any later one is
+# a replay that gets the stored result. Once the quiz is regenerated the
+# stored submission is for an older version and a retake replaces it.
+#
+# On a replica set (or sharded cluster) both writes run in one transaction.
+# On a standalone server the conditional submission write goes first and
+# decides the outcome; the assignment update is idempotent and re-applied on
+# every replay, which repairs a crash between the two writes.
+#
+# Progress counters are incremented after the writes, once, by the request
+# that won. They stay out of the transaction so a cohort submitting the same
+# quiz doesn't conflict on the PDF's counter document; a crash in between is
+# reconciled by `progress.rebuild`.
+
+SUBMITTED = "submitted"
+REPLAYED = "replayed"
+
+def open_for(version: int) -> Dict[str, Any]:
+    """Filter matching a submission that is not graded for quiz `version`:
+    in progress, or graded for an earlier version (a retake)"""
+    open_states = [{"score": None}, {"quiz_version": {"$lt": version}}]
+    if version > 1:
+        # Graded before submissions recorded the quiz version
+        open_states.append({"quiz_version": {"$exists": False}})
+    return {"$or": open_states}
+
+def is_graded_for(submission: Optional[Dict[str, Any]], version: int) -> bool:
+    """Whether `submission` is a graded submission of quiz `version`; the complement of open_for"""
+    if not submission or submission.get("score") is None:
+        return False
+    graded_version = submission.get("quiz_version")
+    return graded_version >= version if graded_version is not None else version == 1
+
+async def _write_submission(db, doc: Dict[str, Any], session=None) -> Optional[Dict[str, Any]]:
+    """Grade the submission unless this quiz version is already graded; returns
+    the replaced document. DuplicateKeyError if it is already graded"""
+    return await db.quiz_submissions.find_one_and_update(
+        # A graded submission of this version doesn't match, so the upsert hits the unique index
+        {"user_id": doc["user_id"], "quiz_id": doc["quiz_id"], **open_for(doc["quiz_version"])},
+        {"$set": doc, "$unset": {"in_progress_json": ""}},
+        projection={"score": 1},
+        upsert=True,
+        session=session
+    )
+
+async def _complete_assignment(db, user_id: ObjectId, pdf_id: ObjectId, completed_at: datetime, session=None) -> bool:
+    """Mark the assignment's quiz completed; False if it already was"""
+    result = await db.assignments.update_one(
+        {"user_id": user_id, "pdf_id": pdf_id, "is_quiz_completed": {"$ne": True}},
+        {"$set": {"is_quiz_completed": True, "quiz_completed_at": completed_at}},
+        session=session
+    )
+    return result.modified_count > 0
+
+async def _apply(db, doc: Dict[str, Any], pdf_id: ObjectId, session=None) -> Tuple[Optional[Dict[str, Any]], bool]:
+    previous = await _write_submission(db, doc, session)
+    completed = await _complete_assignment(db, doc["user_id"], pdf_id, doc["submitted_at"], session)
+    return previous, completed
+
+async def submit(
+    db,
+    user_id: ObjectId,
+    quiz: CachedQuiz,
+    answers: Dict[str, Any],
+    correct_answers: int,
+    score: float
+) -> Tuple[Dict[str, Any], str]:
+    """Record a graded submission; returns the stored submission and SUBMITTED or REPLAYED"""
+    doc = {
+        "user_id": user_id,
+        "quiz_id": quiz.quiz_id,
+        "responses_json": answers,
+        "score": score,
+        "correct_answers": correct_answers,
+        "total_questions": quiz.total_questions,
+        "quiz_version": quiz.version,
+        "questions_version": quiz.questions_version,
+        "submitted_at": datetime.utcnow()
+    }
+
+    try:
+        if await supports_transactions():
+            async with await get_client().start_session() as session:
+                # Retries transient errors, e.g. a write conflict with a
+                # concurrent submit, which then resolves as a replay
+                previous, completed = await session.with_transaction(lambda s: _apply(db, doc, quiz.pdf_id, s))
+        else:
+            previous, completed = await _apply(db, doc, quiz.pdf_id)
+    except DuplicateKeyError:
+        pass
+    else:
+        # A retake replaces the earlier score rather than adding to it
+        previous_score = (previous or {}).get("score")
+        await progress.record_submission(
+            db, user_id, quiz.pdf_id,
+            score_delta=score - (previous_score or 0.0),
+            scored=previous_score is None,
+            completed=completed
+        )
+        return doc, SUBMITTED
+
+    existing = await db.quiz_submissions.find_one({"user_id": user_id, "quiz_id": quiz.quiz_id})
+    if await _complete_assignment(db, user_id, quiz.pdf_id, existing.get("submitted_at") or doc["submitted_at"]):
+        # Repaired a submit that stopped between its writes; `rebuild` reconciles its score
+        await progress.record_submission(db, user_id, quiz.pdf_id, score_delta=0.0, scored=False, completed=True)
+    return existing, REPLAYED
@@ -0,0 +1,98 @@
+import re
+from typing import Any, Dict, List
+
+# Token-budgeted chunking of extracted PDF text.
+#
+# Pages are packed greedily into chunks under a token budget. A page that is
+# over budget on its own is split at section boundaries (blank lines), then at
+# line breaks, and only as a last resort mid-line.
+
+CHARS_PER_TOKEN = 4
+
+_SEPARATORS = ["\n\n", "\n"]
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count; close enough for budgeting English prose"""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+def _split_oversized(text: str, max_chars: int, separators: List[str]) -> List[str]:
+    if len(text) <= max_chars:
+        return [text]
+    if not separators:
+        return [text[i:i + max_chars] for i in range(0, len(text), max_chars)]
+
+    separator, rest = separators[0], separators[1:]
+    pieces = []
+    current = ""
+    for part in text.split(separator):
+        candidate = f"{current}{separator}{part}" if current else part
+        if len(candidate) <= max_chars:
+            current = candidate
+            continue
+        if current:
+            pieces.append(current)
+        if len(part) > max_chars:
+            pieces.extend(_split_oversized(part, max_chars, rest))
+            current = ""
+        else:
+            current = part
+    if current:
+        pieces.append(current)
+    return pieces
+
+def chunk_pages(pages: List[str], max_tokens: int) -> List[Dict[str, Any]]:
+    """Pack pages into chunks of at most `max_tokens`.
+
+    Returns dicts with the chunk `text` and the 1-based `first_page` and
+    `last_page` it covers.
+    """
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    chunks = []
+    current: List[str] = []
+    current_len = 0
+    first_page = 1
+
+    def flush(last_page: int):
+        nonlocal current, current_len
+        text = "\n".join(current).strip()
+        if text:
+            chunks.append({"text": text, "first_page": first_page, "last_page": last_page})
+        current = []
+        current_len = 0
+
+    for page_number, page in enumerate(pages, start=1):
+        page = re.sub(r"[ \t]+", " ", page).strip()
+        if not page:
+            continue
+
+        if len(page) > max_chars:
+            # Oversized page: close the open chunk and emit its sections on their own
+            if current:
+                flush(page_number - 1)
+            for piece in _split_oversized(page, max_chars, _SEPARATORS):
+                first_page = page_number
+                current, current_len = [piece], len(piece)
+                flush(page_number)
+            continue
+
+        if current and current_len + len(page) + 1 > max_chars:
+            flush(page_number - 1)
+        if not current:
+            first_page = page_number
+        current.append(page)
+        current_len += len(page) + 1
+
+    if current:
+        flush(len(pages))
+    return chunks
+
+def coverage_order(count: int, picks: int) -> List[int]:
+    """Indices 0..count-1 with `picks` evenly spaced ones first"""
+    if count == 0:
+        return []
+    picks = max(1, min(picks, count))
+    if picks == 1:
+        first = [0]
+    else:
+        first = sorted({round(i * (count - 1) / (picks - 1)) for i in range(picks)})
+    return first + [i for i in range(count) if i not in first]
@@ -0,0 +1,93 @@
+import asyncio
+import struct
+import zlib
+from typing import List, Optional, Tuple
+from ..core.config import settings
+from .storage import StorageError, get_storage
+
+# Page-indexed store for extracted PDF text, one object per content hash,
+# kept in the upload storage backend next to the PDFs.
+#
+# Layout:
+#   magic      8 bytes   b"LMSTXT1\0"
+#   count      uint32    number of pages
+#   table      count x (uint64 offset, uint32 length) of each compressed page
+#   blocks     zlib-compressed UTF-8 text of each page
+#
+# A page range is read with three ranged reads (header, table slice, blocks)
+# without fetching or decompressing the rest of the document or reopening the PDF.
+
+MAGIC = b"LMSTXT1\0"
+_HEADER = struct.Struct("<8sI")
+_ENTRY = struct.Struct("<QI")
+
+class TextStoreError(Exception):
+    """Raised when a stored text artifact is missing or corrupt"""
+
+def text_key(content_hash: str) -> str:
+    return f"text/{content_hash}.pages"
+
+def encode_pages(pages: List[str]) -> bytes:
+    blocks = [zlib.compress(page.encode("utf-8"), settings.TEXT_STORE_COMPRESSION_LEVEL) for page in pages]
+    offset = _HEADER.size + _ENTRY.size * len(blocks)
+    table = []
+    for block in blocks:
+        table.append(_ENTRY.pack(offset, len(block)))
+        offset += len(block)
+    return b"".join([_HEADER.pack(MAGIC, len(blocks)), *table, *blocks])
+
+def _decode_blocks(data: bytes, first_offset: int, entries: List[Tuple[int, int]]) -> List[str]:
+    return [
+        zlib.decompress(data[offset - first_offset:offset - first_offset + length]).decode("utf-8")
+        for offset, length in entries
+    ]
+
+async def _read_exact(key: str, offset: int, size: int) -> bytes:
+    try:
+        data = await get_storage().read_range(key, offset, size)
+    except StorageError:
+        raise TextStoreError("No extracted text stored for this PDF")
+    if len(data) != size:
+        raise TextStoreError("Truncated text artifact")
+    return data
+
+async def write_pages(content_hash: str, pages: List[str]):
+    data = await asyncio.to_thread(encode_pages, pages)
+    await get_storage().put_bytes(text_key(content_hash), data)
+
+async def has_pages(content_hash: str) -> bool:
+    return await get_storage().exists(text_key(content_hash))
+
+async def read_pages(content_hash: str, start: int = 0, end: Optional[int] = None) -> Tuple[List[str], int]:
+    """Pages [start, end) (0-based) and the document's page count"""
+    key = text_key(content_hash)
+    magic, count = _HEADER.unpack(await _read_exact(key, 0, _HEADER.size))
+    if magic != MAGIC:
+        raise TextStoreError("Not a page text artifact")
+
+    end = count if end is None else min(end, count)
+    if start >= end:
+        return [], count
+    table = await _read_exact(key, _HEADER.size + start * _ENTRY.size, (end - start) * _ENTRY.size)
+    entries = [_ENTRY.unpack_from(table, i * _ENTRY.size) for i in range(end - start)]
+
+    # Pages are contiguous, so the whole range is one read
+    first_offset = entries[0][0]
+    last_offset, last_length = entries[-1]
+    data = await _read_exact(key, first_offset, last_offset + last_length - first_offset)
+    pages = await asyncio.to_thread(_decode_blocks, data, first_offset, entries)
+    return pages, count
+
+async def read_page(content_hash: str, page_number: int) -> Tuple[Optional[str], int]:
+    """One page (1-based) and the page count; None if the page is out of range"""
+    pages, count = await read_pages(content_hash, page_number - 1, page_number)
+    return (pages[0] if pages else None), count
+
+async def load_all_pages(content_hash: str) -> Optional[List[str]]:
+    if not await has_pages(content_hash):
+        return None
+    pages, _ = await read_pages(content_hash)
+    return pages
+
+async def delete(content_hash: str):
+    await get_storage().delete(text_key(content_hash))
@@ -1,11 +1,36 @@
+import asyncio
+import math
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Dict, Optional, Tuple
+from uuid import uuid4
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status
 from ..core.config import settings
+from ..services.auth_cache import auth_cache, token_key
+from ..services.revocation import revocation_list
+from .rate_limit import KeyedRateLimiter
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    # Hashes below the configured work factor are upgraded on the next login
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS
+)
+
+# bcrypt releases the GIL, so a small pool hashes in parallel off the event loop
+_hash_executor = ThreadPoolExecutor(max_workers=max(1, settings.BCRYPT_WORKERS), thread_name_prefix="bcrypt")
+
+_account_limiter = KeyedRateLimiter(
+    settings.LOGIN_ATTEMPTS_PER_ACCOUNT / settings.LOGIN_ACCOUNT_WINDOW_SECONDS,
+    settings.LOGIN_ATTEMPTS_PER_ACCOUNT
+)
+_ip_limiter = KeyedRateLimiter(
+    settings.LOGIN_ATTEMPTS_PER_IP / settings.LOGIN_IP_WINDOW_SECONDS,
+    settings.LOGIN_ATTEMPTS_PER_IP
+)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
@@ -13,6 +38,33 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+async def hash_password(password: str) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_executor, pwd_context.hash, password)
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify on the hashing pool; also returns a new hash if the stored one is outdated"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_executor, pwd_context.verify_and_update, plain_password, hashed_password)
+
+def check_login_rate(email: str, client_ip: str):
+    """Reject credential floods per client IP and per account, before any hash work.
+
+    `client_ip` must be the real client address (see FORWARDED_ALLOW_IPS);
+    behind an unconfigured proxy every login would share one IP bucket.
+    """
+    for limiter, key in ((_ip_limiter, client_ip), (_account_limiter, email.lower())):
+        if not limiter.try_acquire(key):
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many login attempts, please try again later",
+                headers={"Retry-After": str(math.ceil(limiter.retry_after(key)))}
+            )
+
+def reset_login_rate(email: str):
+    """Forget an account's failed attempts after a successful login"""
+    _account_limiter.reset(email.lower())
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -20,10 +72,46 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "iat": datetime.utcnow(), "jti": uuid4().hex, "type": "access"})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
+def create_refresh_token(user_id: str, family: str) -> str:
+    """Single-use token for /auth/refresh; `fam` links every rotation of one login"""
+    now = datetime.utcnow()
+    to_encode = {
+        "sub": user_id,
+        "type": "refresh",
+        "jti": uuid4().hex,
+        "fam": family,
+        "iat": now,
+        "exp": now + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    }
+    return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+def issue_token_pair(user: Dict[str, Any], family: Optional[str] = None) -> Dict[str, str]:
+    """Access and refresh tokens for a user; a new login starts a new family"""
+    family = family or uuid4().hex
+    access_token = create_access_token(
+        data={"sub": str(user["_id"]), "email": user["email"], "role": user["role"], "fam": family}
+    )
+    return {
+        "access_token": access_token,
+        "refresh_token": create_refresh_token(str(user["_id"]), family),
+        "token_type": "bearer"
+    }
+
+def token_expiry(payload: Dict[str, Any]) -> datetime:
+    return datetime.utcfromtimestamp(payload["exp"])
+
+def family_expiry() -> datetime:
+    """Latest possible expiry of any token in a family issued up to now"""
+    return datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+
+def revocation_id(token: str, payload: Dict[str, Any]) -> str:
+    # Tokens issued before `jti` existed are identified by their hash
+    return payload.get("jti") or token_key(token)
+
 def verify_token(token: str) -> Optional[dict]:
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
@@ -32,8 +120,21 @@ def verify_token(token: str) -> Optional[dict]:
         return None
 
 def get_current_user_from_token(token: str):
-    payload = verify_token(token)
+    # Signature checks are skipped for tokens verified recently
+    payload = auth_cache.get_payload(token)
     if payload is None:
+        payload = verify_token(token)
+        if payload is not None:
+            auth_cache.set_payload(token, payload)
+    
+    # Revocation is checked against the in-memory list, without a Mongo round trip
+    if (
+        payload is None
+        or payload.get("type") == "refresh"
+        or revocation_list.is_revoked(revocation_id(token, payload))
+        or revocation_list.is_revoked(payload.get("fam"))
+        or revocation_list.issued_before_cutoff(payload)
+    ):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
@@ -0,0 +1,64 @@
+import json
+from typing import Iterable
+from ..core.config import settings
+
+# Room for the multipart boundaries and the form fields sent with the file
+MULTIPART_OVERHEAD = 64 * 1024
+
+class UploadSizeLimitMiddleware:
+    """Rejects oversized upload bodies with 413 before they are spooled.
+
+    Starlette parses the whole multipart body before a route runs, so the
+    limit has to be applied here: a declared Content-Length over the limit is
+    refused without reading the body, and a body without one (chunked) is cut
+    off as soon as it passes the limit.
+    """
+
+    def __init__(self, app, paths: Iterable[str], max_body_size: int = settings.MAX_FILE_SIZE + MULTIPART_OVERHEAD):
+        self.app = app
+        self.paths = set(paths)
+        self.max_body_size = max_body_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        content_length = headers.get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > self.max_body_size:
+            await self._reject(send)
+            return
+
+        received = 0
+        rejected = False
+
+        async def limited_receive():
+            nonlocal received, rejected
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body_size and not rejected:
+                    rejected = True
+                    await self._reject(send)
+            if rejected:
+                # The app sees a disconnect and stops parsing the body
+                return {"type": "http.disconnect"}
+            return message
+
+        async def guarded_send(message):
+            # Nothing the app sends after the 413 reaches the client
+            if not rejected:
+                await send(message)
+
+        await self.app(scope, limited_receive, guarded_send)
+
+    async def _reject(self, send):
+        limit_mb = settings.MAX_FILE_SIZE / (1024 * 1024)
+        body = json.dumps({"detail": f"File exceeds the {limit_mb:g}MB upload limit"}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode("ascii"))]
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,124 @@
+import re
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Optional, Tuple
+from fastapi import HTTPException, Request, status
+from fastapi.responses import Response, StreamingResponse
+from ..core.config import settings
+from ..services.storage import get_storage
+
+# Conditional and byte-range file delivery (RFC 9110 sections 13 and 14).
+#
+# Only single ranges are served; multi-range requests fall back to the full
+# body, which the spec allows. Ranges are honoured only with a strong ETag so
+# a client can never stitch together bytes from two different files.
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """Weak comparison for If-None-Match"""
+    if header.strip() == "*":
+        return True
+    bare = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == bare for candidate in header.split(","))
+
+def _not_modified(request: Request, etag: str, mtime: float) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-Modified-Since is ignored when If-None-Match is present
+        return _etag_matches(if_none_match, etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return int(mtime) <= since.timestamp()
+    return False
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Inclusive (start, end) for a single `bytes=` range; None to serve the full body"""
+    if not header:
+        return None
+    match = _RANGE_RE.match(header.strip())
+    if not match:
+        # Multiple or unknown ranges
+        return None
+
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        if last and int(last) < start:
+            # Syntactically invalid, so ignored
+            return None
+        end = min(int(last), size - 1) if last else size - 1
+    elif last:
+        # Suffix range: the final N bytes
+        start = max(size - int(last), 0) if int(last) else size
+        end = size - 1
+    else:
+        return None
+
+    if start >= size:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"}
+        )
+    return start, end
+
+async def file_response(
+    request: Request,
+    key: str,
+    etag: Optional[str] = None,
+    media_type: str = "application/pdf",
+    filename: Optional[str] = None
+) -> Response:
+    """Serve stored object `key` with validators, 304s and single byte ranges; `etag` should be strong"""
+    storage = get_storage()
+    info = await storage.stat(key)
+    if info is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="File not found"
+        )
+
+    size = info.size
+    if etag is None:
+        # Without a content hash only a weak validator is available
+        etag = f'W/"{int(info.modified)}-{size}"'
+    headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(info.modified, usegmt=True),
+        "Cache-Control": f"private, max-age={settings.DOCUMENT_CACHE_MAX_AGE}, immutable",
+        "Accept-Ranges": "bytes"
+    }
+    if filename:
+        headers["Content-Disposition"] = f'inline; filename="{filename}"'
+
+    if _not_modified(request, etag, info.modified):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    byte_range = None
+    if_range = request.headers.get("if-range")
+    if not etag.startswith("W/") and (if_range is None or if_range.strip() == etag):
+        byte_range = parse_range(request.headers.get("range"), size)
+
+    if byte_range is None:
+        start, end, status_code = 0, size - 1, status.HTTP_200_OK
+    else:
+        start, end = byte_range
+        status_code = status.HTTP_206_PARTIAL_CONTENT
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+
+    length = end - start + 1 if size else 0
+    headers["Content-Length"] = str(length)
+
+    if request.method == "HEAD":
+        return Response(status_code=status_code, headers=headers, media_type=media_type)
+    return StreamingResponse(
+        storage.iter_range(key, start, length),
+        status_code=status_code,
+        headers=headers,
+        media_type=media_type
+    )
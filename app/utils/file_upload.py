@@ -1,11 +1,19 @@
 import os
+import hashlib
+import tempfile
 import aiofiles
+from typing import Tuple
 from fastapi import UploadFile, HTTPException
 from ..core.config import settings
-from datetime import datetime
 
-async def save_upload_file(upload_file: UploadFile) -> str:
-    """Save uploaded file and return the file path"""
+async def stream_upload_to_temp(upload_file: UploadFile) -> Tuple[str, str, int]:
+    """Stream an upload to a temp file in UPLOAD_DIR in fixed-size chunks.
+    
+    Enforces MAX_FILE_SIZE on the file itself and hashes the content on the
+    way through. Oversized request bodies are already refused by
+    UploadSizeLimitMiddleware before Starlette spools them. Returns
+    (temp_path, sha256 hex digest, size in bytes).
+    """
     
     # Create uploads directory if it doesn't exist
     os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
@@ -14,30 +22,38 @@ async def save_upload_file(upload_file: UploadFile) -> str:
     if not upload_file.filename.lower().endswith('.pdf'):
         raise HTTPException(status_code=400, detail="Only PDF files are allowed")
     
-    # Generate unique filename
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"{timestamp}_{upload_file.filename}"
-    file_path = os.path.join(settings.UPLOAD_DIR, filename)
+    # Temp file lives in UPLOAD_DIR so the final rename stays on one filesystem
+    fd, temp_path = tempfile.mkstemp(dir=settings.UPLOAD_DIR, suffix=".part")
+    os.close(fd)
     
-    # Save file
+    hasher = hashlib.sha256()
+    size = 0
     try:
-        async with aiofiles.open(file_path, 'wb') as out_file:
-            content = await upload_file.read()
-            await out_file.write(content)
+        async with aiofiles.open(temp_path, 'wb') as out_file:
+            while True:
+                chunk = await upload_file.read(settings.UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > settings.MAX_FILE_SIZE:
+                    raise _file_too_large()
+                hasher.update(chunk)
+                await out_file.write(chunk)
+    except HTTPException:
+        remove_quietly(temp_path)
+        raise
     except Exception as e:
+        remove_quietly(temp_path)
         raise HTTPException(status_code=500, detail=f"Error saving file: {str(e)}")
     
-    return file_path
+    return temp_path, hasher.hexdigest(), size
+
+def _file_too_large() -> HTTPException:
+    limit_mb = settings.MAX_FILE_SIZE / (1024 * 1024)
+    return HTTPException(status_code=413, detail=f"File exceeds the {limit_mb:g}MB upload limit")
 
-def extract_text_from_pdf(file_path: str) -> str:
-    """Extract text content from PDF file"""
+def remove_quietly(path: str):
     try:
-        import fitz  # PyMuPDF
-        doc = fitz.open(file_path)
-        text = ""
-        for page in doc:
-            text += page.get_text()
-        doc.close()
-        return text
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error extracting text from PDF: {str(e)}") 
\ No newline at end of file
+        os.remove(path)
+    except OSError:
+        pass
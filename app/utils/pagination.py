@@ -0,0 +1,97 @@
+import base64
+import binascii
+from typing import Any, Dict, List, Optional, Tuple
+import bson
+from bson.errors import BSONError
+from fastapi import HTTPException, Query, Response, status
+from ..core.config import settings
+
+# Keyset (cursor) pagination.
+#
+# Pages are ordered by a list of fields ending in `_id`, e.g. ["_id"] or
+# ["created_at", "_id"]. The cursor is an opaque encoding of the last row's
+# sort values; the next page starts strictly after it, so deep pages cost the
+# same as the first one, unlike skip/offset.
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+class PageParams:
+    """Cursor and page size of a list request"""
+
+    def __init__(self, cursor: Optional[str] = None, limit: int = settings.DEFAULT_PAGE_SIZE):
+        self.cursor = cursor
+        self.limit = limit
+
+def page_params(
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the previous page"),
+    limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE)
+) -> PageParams:
+    """FastAPI dependency for paginated list endpoints"""
+    return PageParams(cursor, limit)
+
+def encode_cursor(values: List[Any]) -> str:
+    raw = bson.encode({"v": values})
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str, expected_length: int) -> List[Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = bson.decode(base64.urlsafe_b64decode(padded))["v"]
+    except (BSONError, binascii.Error, ValueError, KeyError, TypeError):
+        values = None
+    if not isinstance(values, list) or len(values) != expected_length:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    return values
+
+def keyset_filter(sort_fields: List[str], values: List[Any], direction: int = 1) -> Dict[str, Any]:
+    """Match rows strictly after `values` in (sort_fields) order"""
+    op = "$gt" if direction == 1 else "$lt"
+    clauses = []
+    for i, field in enumerate(sort_fields):
+        clause = {sort_fields[j]: values[j] for j in range(i)}
+        clause[field] = {op: values[i]}
+        clauses.append(clause)
+    return clauses[0] if len(clauses) == 1 else {"$or": clauses}
+
+def keyset_stages(params: PageParams, sort_fields: List[str], direction: int = 1) -> List[Dict[str, Any]]:
+    """Aggregation stages selecting one page (plus one row to detect a next page)"""
+    stages = []
+    if params.cursor:
+        values = decode_cursor(params.cursor, len(sort_fields))
+        stages.append({"$match": keyset_filter(sort_fields, values, direction)})
+    stages.append({"$sort": {field: direction for field in sort_fields}})
+    stages.append({"$limit": params.limit + 1})
+    return stages
+
+def finish_page(rows: List[Dict[str, Any]], params: PageParams, sort_fields: List[str]) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Trim the look-ahead row and build the cursor for the next page"""
+    if len(rows) <= params.limit:
+        return rows, None
+    rows = rows[:params.limit]
+    return rows, encode_cursor([rows[-1].get(field) for field in sort_fields])
+
+async def paginate_find(
+    collection,
+    query: Dict[str, Any],
+    params: PageParams,
+    sort_fields: List[str],
+    direction: int = 1,
+    projection: Optional[Dict[str, Any]] = None
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Fetch one page of `query` ordered by `sort_fields`"""
+    if params.cursor:
+        values = decode_cursor(params.cursor, len(sort_fields))
+        query = {"$and": [query, keyset_filter(sort_fields, values, direction)]}
+    rows = await collection.find(query, projection) \
+        .sort([(field, direction) for field in sort_fields]) \
+        .limit(params.limit + 1) \
+        .to_list(length=params.limit + 1)
+    return finish_page(rows, params, sort_fields)
+
+def set_next_cursor(response: Response, next_cursor: Optional[str]):
+    """List endpoints return the next page's cursor in a header, keeping the body a plain list"""
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
@@ -0,0 +1,25 @@
+import hashlib
+import hmac
+import time
+from typing import Tuple
+from urllib.parse import urlencode
+from ..core.config import settings
+
+# Expiring links for clients that cannot send an Authorization header
+# (PDF viewers, <iframe>/<a> tags). The signature covers the path and the
+# expiry, keyed with the app's SECRET_KEY.
+
+def _signature(path: str, expires: int) -> str:
+    message = f"{path}:{expires}".encode("utf-8")
+    return hmac.new(settings.SECRET_KEY.encode("utf-8"), message, hashlib.sha256).hexdigest()
+
+def sign_url(path: str, expires_in: int = settings.SIGNED_URL_TTL_SECONDS) -> Tuple[str, int]:
+    """Signed URL for `path` and its expiry as a Unix timestamp"""
+    expires = int(time.time()) + expires_in
+    query = urlencode({"expires": expires, "signature": _signature(path, expires)})
+    return f"{path}?{query}", expires
+
+def verify_signature(path: str, expires: int, signature: str) -> bool:
+    if expires < time.time():
+        return False
+    return hmac.compare_digest(_signature(path, expires), signature)
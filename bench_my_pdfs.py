@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Benchmark for /employee/my_pdfs
+Compares the per-assignment find_one lookups with the single aggregation
+pipeline, counting Mongo round trips and latency for N seeded assignments.
+
+Usage: python bench_my_pdfs.py [N] [REPEATS]
+Runs against MONGODB_URL in a throwaway database (<DATABASE_NAME>_bench).
+"""
+
+import asyncio
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+
+from app.core.config import settings
+from app.core.indexes import ensure_indexes
+from app.services import pdf_store
+from app.services.reports import get_employee_pdfs
+from app.utils.pagination import PageParams
+
+class RoundTripCounter(monitoring.CommandListener):
+    """Counts commands sent to the server"""
+
+    def __init__(self):
+        self.count = 0
+
+    def started(self, event):
+        self.count += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+async def legacy_get_employee_pdfs(db, user_id):
+    """The previous implementation: three find_one calls per assignment"""
+    assignments = await db.assignments.find({"user_id": user_id}).to_list(length=100)
+    pdfs = []
+    for assignment in assignments:
+        pdf = await db.pdf_documents.find_one({"_id": assignment["pdf_id"]})
+        if pdf:
+            quiz = await db.quizzes.find_one({"pdf_id": assignment["pdf_id"]})
+            submission = None
+            if quiz:
+                submission = await db.quiz_submissions.find_one({
+                    "user_id": user_id,
+                    "quiz_id": quiz["_id"]
+                })
+            pdfs.append({
+                "pdf_id": str(pdf["_id"]),
+                "title": pdf["title"],
+                "description": pdf.get("description", ""),
+                "file_url": pdf_store.document_url(pdf["_id"]),
+                "is_read": assignment["is_read"],
+                "read_at": assignment.get("read_at"),
+                "is_quiz_completed": assignment["is_quiz_completed"],
+                "quiz_completed_at": assignment.get("quiz_completed_at"),
+                "score": submission.get("score") if submission else None
+            })
+    return pdfs
+
+async def aggregated_get_employee_pdfs(db, user_id):
+    """The current implementation, fetching the same 100 rows"""
+    pdfs, _ = await get_employee_pdfs(db, user_id, PageParams(limit=100))
+    return pdfs
+
+async def seed(db, n: int) -> ObjectId:
+    """Create one user with n assigned PDFs, each with a quiz and a graded submission"""
+    for name in ("users", "pdf_documents", "quizzes", "assignments", "quiz_submissions"):
+        await db[name].delete_many({})
+
+    now = datetime.utcnow()
+    user_id = (await db.users.insert_one({
+        "name": "Bench User", "email": "bench@lms.com", "role": "employee", "created_at": now
+    })).inserted_id
+
+    pdf_ids = (await db.pdf_documents.insert_many([
+        {"title": f"PDF {i}", "description": "", "file_url": f"uploads/{i}.pdf", "created_at": now}
+        for i in range(n)
+    ])).inserted_ids
+    quiz_ids = (await db.quizzes.insert_many([
+        {"pdf_id": pdf_id, "questions_json": [], "created_at": now} for pdf_id in pdf_ids
+    ])).inserted_ids
+    await db.assignments.insert_many([
+        {"user_id": user_id, "pdf_id": pdf_id, "is_read": i % 2 == 0, "is_quiz_completed": i % 3 == 0, "created_at": now}
+        for i, pdf_id in enumerate(pdf_ids)
+    ])
+    await db.quiz_submissions.insert_many([
+        {"user_id": user_id, "quiz_id": quiz_id, "score": float(i % 100), "submitted_at": now}
+        for i, quiz_id in enumerate(quiz_ids)
+    ])
+
+    # Indexes the lookups rely on
+    await ensure_indexes(db)
+    return user_id
+
+async def measure(label: str, func, db, user_id, counter: RoundTripCounter, repeats: int):
+    timings = []
+    round_trips = 0
+    result = None
+    for _ in range(repeats):
+        counter.count = 0
+        start = time.perf_counter()
+        result = await func(db, user_id)
+        timings.append((time.perf_counter() - start) * 1000)
+        round_trips = counter.count
+    print(f"{label:<12} round trips: {round_trips:>5}   median: {statistics.median(timings):8.1f} ms   "
+          f"min: {min(timings):8.1f} ms   rows: {len(result)}")
+    return result
+
+async def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    counter = RoundTripCounter()
+    client = AsyncIOMotorClient(settings.MONGODB_URL, event_listeners=[counter])
+    db = client[f"{settings.DATABASE_NAME}_bench"]
+
+    print(f"Seeding {n} assignments...")
+    user_id = await seed(db, n)
+
+    legacy = await measure("find_one", legacy_get_employee_pdfs, db, user_id, counter, repeats)
+    batched = await measure("aggregate", aggregated_get_employee_pdfs, db, user_id, counter, repeats)
+
+    same = sorted(legacy, key=lambda p: p["pdf_id"]) == sorted(batched, key=lambda p: p["pdf_id"])
+    print(f"Responses identical: {same}")
+
+    await client.drop_database(db.name)
+    client.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -10,6 +10,8 @@ import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from app.core.db import connect_to_mongo, close_mongo_connection, get_database
+from app.core.indexes import ensure_indexes, print_index_report
+from app.services.progress import backfill_if_empty
 from app.utils.auth import get_password_hash
 from datetime import datetime
 
@@ -17,11 +19,20 @@ async def init_database():
     """Initialize database with sample data"""
     
     # Connect to MongoDB
-    await connect_to_mongo()
+    await connect_to_mongo(ensure=False)
     db = get_database()
     
     print("🚀 Initializing LMS Database...")
     
+    # Reconcile indexes
+    report = await ensure_indexes(db)
+    print("📇 Index report:")
+    print_index_report(report)
+    
+    # Build progress counters for existing assignments and submissions
+    if await backfill_if_empty(db):
+        print("📊 Progress counters backfilled")
+    
     # Sample users data
     sample_users = [
         {
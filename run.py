@@ -1,9 +1,14 @@
 import uvicorn
+from app.core.config import settings
 
 if __name__ == "__main__":
     uvicorn.run(
         "app.main:app",
         host="0.0.0.0",
         port=8000,
-        reload=True
+        reload=True,
+        # Client IPs (used by the login throttle) come from X-Forwarded-For
+        # when the request arrives through a trusted proxy
+        proxy_headers=True,
+        forwarded_allow_ips=settings.FORWARDED_ALLOW_IPS
     ) 
\ No newline at end of file
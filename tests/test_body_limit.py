@@ -0,0 +1,67 @@
+import asyncio
+import json
+from app.utils.body_limit import UploadSizeLimitMiddleware
+
+UPLOAD_PATH = "/admin/upload_pdf"
+
+async def echo_length(scope, receive, send):
+    """Reads the whole body and answers with its length, or 400 on disconnect"""
+    total = 0
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            status, body = 400, b"disconnected"
+            break
+        total += len(message.get("body", b""))
+        if not message.get("more_body"):
+            status, body = 200, str(total).encode()
+            break
+    await send({"type": "http.response.start", "status": status, "headers": []})
+    await send({"type": "http.response.body", "body": body})
+
+def call(chunks, headers=(), path=UPLOAD_PATH, max_body_size=100):
+    """Run one request through the middleware; returns (messages sent, chunks read)"""
+    middleware = UploadSizeLimitMiddleware(echo_length, [UPLOAD_PATH], max_body_size=max_body_size)
+    pending = list(chunks)
+    sent = []
+    read = 0
+
+    async def receive():
+        nonlocal read
+        if not pending:
+            return {"type": "http.disconnect"}
+        read += 1
+        body = pending.pop(0)
+        return {"type": "http.request", "body": body, "more_body": bool(pending)}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "path": path, "headers": list(headers)}
+    asyncio.run(middleware(scope, receive, send))
+    return sent, read
+
+def statuses(sent):
+    return [message["status"] for message in sent if message["type"] == "http.response.start"]
+
+def test_declared_length_over_limit_is_refused_unread():
+    sent, read = call([b"x" * 500], headers=[(b"content-length", b"500")])
+    assert statuses(sent) == [413]
+    assert read == 0
+    assert "upload limit" in json.loads(sent[1]["body"])["detail"]
+
+def test_chunked_body_is_cut_off_at_the_limit():
+    sent, read = call([b"x" * 60] * 5)
+    assert statuses(sent) == [413]
+    # Reading stops with the chunk that crossed the limit
+    assert read == 2
+
+def test_body_within_limit_passes_through():
+    sent, _ = call([b"x" * 60, b"x" * 40], headers=[(b"content-length", b"100")])
+    assert statuses(sent) == [200]
+    assert sent[1]["body"] == b"100"
+
+def test_other_paths_are_not_limited():
+    sent, _ = call([b"x" * 60] * 5, path="/other")
+    assert statuses(sent) == [200]
+    assert sent[1]["body"] == b"300"
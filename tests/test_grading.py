@@ -0,0 +1,46 @@
+import pytest
+from bson import ObjectId
+from app.services.grading import encode_batch, grade_submission, score_batch
+from app.services.quiz_cache import compile_quiz
+
+def make_quiz(questions):
+    return compile_quiz({"_id": ObjectId(), "pdf_id": ObjectId(), "questions_json": questions})
+
+@pytest.fixture
+def quiz():
+    return make_quiz([
+        {"question": "q0", "options": ["a", "b", "c"], "answer": "a"},
+        {"question": "q1", "options": ["a", "b", "c"], "answer": "b"},
+        {"question": "q2", "options": ["a", "b", "c"], "answer": "c"},
+        {"question": "q3", "options": ["a", "b"], "answer": "not listed"}
+    ])
+
+def test_encode_batch_fills_missing_responses(quiz):
+    matrix = encode_batch(quiz, [{"0": "b"}, None, {}])
+    assert matrix.tolist() == [[1, -2, -2, -2], [-2] * 4, [-2] * 4]
+
+def test_score_batch(quiz):
+    correct, scores = score_batch(quiz, [
+        {"0": "a", "1": "b", "2": "c", "3": "a"},
+        {"0": "a", "1": "c"},
+        {},
+        {"0": "x", "1": "y", "2": "z", "3": "not listed"}
+    ])
+    assert correct.tolist() == [3, 1, 0, 0]
+    assert scores.tolist() == [75.0, 25.0, 0.0, 0.0]
+
+def test_unanswered_never_matches_unmatchable_answer(quiz):
+    # -1 (answer not an option) and -2 (unanswered) must stay distinct
+    assert grade_submission(quiz, {}) == (0, 0.0)
+
+def test_grade_submission_returns_python_types(quiz):
+    correct, score = grade_submission(quiz, {"0": "a", "1": "b"})
+    assert (correct, score) == (2, 50.0)
+    assert type(correct) is int and type(score) is float
+
+def test_quiz_without_questions():
+    quiz = make_quiz([])
+    correct, scores = score_batch(quiz, [{}, {"0": "a"}])
+    assert correct.tolist() == [0, 0]
+    assert scores.tolist() == [0.0, 0.0]
+    assert grade_submission(quiz, {}) == (0, 0.0)
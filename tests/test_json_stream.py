@@ -0,0 +1,54 @@
+from app.services.json_stream import IncrementalJSONArrayParser
+
+def feed_all(parser, chunks):
+    items = []
+    for chunk in chunks:
+        items.extend(parser.feed(chunk))
+    return items
+
+def test_yields_each_element_when_it_closes():
+    parser = IncrementalJSONArrayParser()
+    assert parser.feed('[{"a": 1}, {"b"') == [{"a": 1}]
+    assert parser.feed(': 2}') == [{"b": 2}]
+    assert not parser.done
+    assert parser.feed(']') == []
+    assert parser.done
+
+def test_skips_preamble_before_the_array():
+    parser = IncrementalJSONArrayParser()
+    assert parser.feed('Here is your quiz:\n[{"q": 1}]') == [{"q": 1}]
+    assert parser.done
+
+def test_brackets_and_escapes_inside_strings():
+    text = '[{"q": "What is [x] {y}?", "e": "say \\"}\\" \\\\"}]'
+    parser = IncrementalJSONArrayParser()
+    assert feed_all(parser, list(text)) == [{"q": "What is [x] {y}?", "e": 'say "}" \\'}]
+    assert parser.done
+
+def test_nested_elements():
+    parser = IncrementalJSONArrayParser()
+    items = parser.feed('[{"options": ["a", "b"], "meta": {"n": [1, 2]}}, [3]]')
+    assert items == [{"options": ["a", "b"], "meta": {"n": [1, 2]}}, [3]]
+
+def test_malformed_element_is_dropped_and_counted():
+    parser = IncrementalJSONArrayParser()
+    items = parser.feed('[{"a": 1}, {"b": oops}, {"c": 3}]')
+    assert items == [{"a": 1}, {"c": 3}]
+    assert parser.malformed == 1
+
+def test_text_after_the_array_is_ignored():
+    parser = IncrementalJSONArrayParser()
+    assert parser.feed('[{"a": 1}] and [{"b": 2}]') == [{"a": 1}]
+    assert parser.feed('[{"c": 3}]') == []
+
+def test_chunk_boundaries_do_not_change_the_result():
+    text = 'ok [{"question": "Q1", "options": ["x", "y"]}, {"question": "Q2\\n", "options": []}]'
+    expected = IncrementalJSONArrayParser().feed(text)
+    for size in (1, 2, 3, 7, 16):
+        chunks = [text[i:i + size] for i in range(0, len(text), size)]
+        assert feed_all(IncrementalJSONArrayParser(), chunks) == expected
+
+def test_consumed_text_is_released():
+    parser = IncrementalJSONArrayParser()
+    parser.feed('[' + ', '.join('{"n": %d}' % i for i in range(100)) + ', {"n"')
+    assert parser._buffer == '{"n"'
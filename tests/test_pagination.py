@@ -0,0 +1,59 @@
+import pytest
+from bson import ObjectId
+from datetime import datetime
+from fastapi import HTTPException
+from app.utils.pagination import (
+    PageParams, decode_cursor, encode_cursor, finish_page, keyset_filter, keyset_stages
+)
+
+def test_cursor_round_trip():
+    values = [datetime(2024, 5, 1, 12, 30), ObjectId()]
+    cursor = encode_cursor(values)
+    assert "=" not in cursor
+    assert decode_cursor(cursor, 2) == values
+
+@pytest.mark.parametrize("cursor", ["garbage!", "", encode_cursor([1, 2])])
+def test_invalid_cursor(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor, 1)
+    assert error.value.status_code == 400
+
+def test_keyset_filter_single_field():
+    assert keyset_filter(["_id"], [5]) == {"_id": {"$gt": 5}}
+    assert keyset_filter(["_id"], [5], direction=-1) == {"_id": {"$lt": 5}}
+
+def test_keyset_filter_compound():
+    assert keyset_filter(["created_at", "_id"], ["t", 5]) == {"$or": [
+        {"created_at": {"$gt": "t"}},
+        {"created_at": "t", "_id": {"$gt": 5}}
+    ]}
+
+def test_keyset_stages():
+    assert keyset_stages(PageParams(limit=10), ["_id"]) == [{"$sort": {"_id": 1}}, {"$limit": 11}]
+    cursor = encode_cursor([7])
+    assert keyset_stages(PageParams(cursor, 10), ["_id"], direction=-1) == [
+        {"$match": {"_id": {"$lt": 7}}},
+        {"$sort": {"_id": -1}},
+        {"$limit": 11}
+    ]
+
+def test_finish_page():
+    rows = [{"_id": i} for i in range(3)]
+    assert finish_page(rows, PageParams(limit=3), ["_id"]) == (rows, None)
+
+    page, cursor = finish_page(rows, PageParams(limit=2), ["_id"])
+    assert page == rows[:2]
+    assert decode_cursor(cursor, 1) == [1]
+
+def test_pages_walk_every_row_once():
+    rows = [{"_id": i} for i in range(7)]
+    seen, cursor = [], None
+    while True:
+        params = PageParams(cursor, 3)
+        start = decode_cursor(cursor, 1)[0] if cursor else -1
+        fetched = [row for row in rows if row["_id"] > start][:params.limit + 1]
+        page, cursor = finish_page(fetched, params, ["_id"])
+        seen.extend(page)
+        if not cursor:
+            break
+    assert seen == rows
@@ -0,0 +1,90 @@
+import asyncio
+import pytest
+from bson import ObjectId
+from app.services import quiz_cache as quiz_cache_module
+from app.services.quiz_cache import QuizCache, compile_quiz
+
+run = asyncio.run
+
+def make_quiz(version=1, answer="4"):
+    return {
+        "_id": ObjectId("64b000000000000000000001"),
+        "pdf_id": ObjectId("64b000000000000000000002"),
+        "version": version,
+        "questions_json": [
+            {"question": "2 + 2?", "options": ["3", "4", "5"], "answer": answer},
+            {"question": "Capital of France?", "options": ["Paris", "Lyon", "Paris"], "answer": "Paris"}
+        ]
+    }
+
+def test_compile_quiz_strips_answers():
+    quiz = compile_quiz(make_quiz())
+    assert all("answer" not in question for question in quiz.questions)
+    assert quiz.questions[0]["options"] == ["3", "4", "5"]
+    assert quiz.total_questions == 2
+
+def test_compile_quiz_answer_key():
+    assert compile_quiz(make_quiz()).answer_key == [1, 0]
+    # An answer that is not among the options can never be matched
+    assert compile_quiz(make_quiz(answer="22")).answer_key == [-1, 0]
+
+def test_compile_quiz_versions_default():
+    doc = make_quiz()
+    del doc["version"]
+    quiz = compile_quiz(doc)
+    assert quiz.version == 1
+    assert quiz.questions_version == 0
+
+def test_duplicate_options_map_to_first_index():
+    assert compile_quiz(make_quiz()).option_index[1] == {"Paris": 0, "Lyon": 1}
+
+@pytest.mark.parametrize("answers, expected", [
+    ({"0": "4", "1": "Lyon"}, [1, 1]),
+    ({"0": "4"}, [1, -2]),
+    ({}, [-2, -2]),
+    ({"0": "not an option", "1": 0}, [-2, -2]),
+    ({"0": None, "1": ["Paris"]}, [-2, -2]),
+    ({"0": "3", "1": "Paris", "7": "extra"}, [0, 0]),
+])
+def test_encode_answers(answers, expected):
+    assert compile_quiz(make_quiz()).encode_answers(answers) == expected
+
+class FakeQuizzes:
+    def __init__(self, doc):
+        self.doc = doc
+        self.full_loads = 0
+
+    async def find_one(self, query, projection=None):
+        if projection is None:
+            self.full_loads += 1
+            return self.doc
+        return {"_id": self.doc["_id"], "version": self.doc["version"]}
+
+class FakeDatabase:
+    def __init__(self, doc):
+        self.quizzes = FakeQuizzes(doc)
+
+@pytest.fixture
+def database(monkeypatch):
+    db = FakeDatabase(make_quiz())
+    monkeypatch.setattr(quiz_cache_module, "get_database", lambda: db)
+    return db
+
+def test_get_current_reuses_matching_version(database):
+    cache = QuizCache()
+    quiz_id = database.quizzes.doc["_id"]
+    first = run(cache.get_current(quiz_id))
+    assert run(cache.get_current(quiz_id)) is first
+    assert database.quizzes.full_loads == 1
+
+def test_get_current_reloads_stale_version(database):
+    cache = QuizCache()
+    quiz_id = database.quizzes.doc["_id"]
+    run(cache.get_by_id(quiz_id))
+    # Another replica corrects the answer key within the TTL
+    database.quizzes.doc = make_quiz(version=2, answer="5")
+    assert run(cache.get_by_id(quiz_id)).version == 1
+    current = run(cache.get_current(quiz_id))
+    assert current.version == 2
+    assert current.answer_key == [2, 0]
+    assert run(cache.get_by_id(quiz_id)) is current
@@ -0,0 +1,84 @@
+import asyncio
+import time
+import pytest
+from app.utils import rate_limit
+from app.utils.rate_limit import KeyedRateLimiter, TokenBucket
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limit.time, "monotonic", clock)
+    return clock
+
+def test_bucket_allows_burst_up_to_capacity(clock):
+    bucket = TokenBucket(rate=1, capacity=3)
+    assert [bucket.try_acquire() for _ in range(4)] == [True, True, True, False]
+
+def test_bucket_refills_at_rate(clock):
+    bucket = TokenBucket(rate=2, capacity=2)
+    assert bucket.try_acquire(2)
+    clock.now += 0.25
+    assert not bucket.try_acquire()
+    clock.now += 0.25
+    assert bucket.try_acquire()
+    assert not bucket.try_acquire()
+
+def test_bucket_never_exceeds_capacity(clock):
+    bucket = TokenBucket(rate=10, capacity=2)
+    clock.now += 60
+    assert bucket.try_acquire(2)
+    assert not bucket.try_acquire()
+
+def test_acquire_waits_for_tokens():
+    bucket = TokenBucket(rate=50, capacity=1)
+
+    async def take_three():
+        started = time.perf_counter()
+        await asyncio.gather(*(bucket.acquire() for _ in range(3)))
+        return time.perf_counter() - started
+
+    # The first token is there already; the other two take 1/50s each
+    assert 0.035 <= asyncio.run(take_three()) < 1
+
+def test_retry_after(clock):
+    bucket = TokenBucket(rate=4, capacity=1)
+    assert bucket.retry_after() == 0.0
+    assert bucket.try_acquire()
+    assert bucket.retry_after() == pytest.approx(0.25)
+    clock.now += 0.1
+    assert bucket.retry_after() == pytest.approx(0.15)
+
+def test_keyed_limiter_separates_keys(clock):
+    limiter = KeyedRateLimiter(rate=1, capacity=2)
+    assert limiter.try_acquire("alice") and limiter.try_acquire("alice")
+    assert not limiter.try_acquire("alice")
+    assert limiter.retry_after("alice") == pytest.approx(1.0)
+    assert limiter.try_acquire("bob")
+    clock.now += 1
+    assert limiter.try_acquire("alice")
+
+def test_keyed_limiter_reset(clock):
+    limiter = KeyedRateLimiter(rate=1, capacity=1)
+    assert limiter.try_acquire("alice")
+    assert not limiter.try_acquire("alice")
+    limiter.reset("alice")
+    assert limiter.try_acquire("alice")
+    limiter.reset("unknown")
+
+def test_keyed_limiter_evicts_least_recently_seen(clock):
+    limiter = KeyedRateLimiter(rate=1, capacity=1, max_keys=2)
+    assert limiter.try_acquire("a") and limiter.try_acquire("b")
+    # Touching "a" makes "b" the oldest key
+    assert not limiter.try_acquire("a")
+    assert limiter.try_acquire("c")
+    assert len(limiter._buckets) == 2
+    assert not limiter.try_acquire("a")
+    # "b" was evicted, so it starts over with a full bucket
+    assert limiter.try_acquire("b")
@@ -0,0 +1,43 @@
+from app.services.text_chunking import CHARS_PER_TOKEN, chunk_pages, coverage_order, estimate_tokens
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 1
+    assert estimate_tokens("x" * 40) == 11
+
+def test_small_pages_are_packed_together():
+    chunks = chunk_pages(["page one", "page two", "page three"], max_tokens=100)
+    assert chunks == [{"text": "page one\npage two\npage three", "first_page": 1, "last_page": 3}]
+
+def test_chunks_stay_under_budget_and_track_pages():
+    pages = ["a" * 30, "b" * 30, "c" * 30, "d" * 30]
+    chunks = chunk_pages(pages, max_tokens=16)  # 64 characters
+    assert [(c["first_page"], c["last_page"]) for c in chunks] == [(1, 2), (3, 4)]
+    assert all(len(c["text"]) <= 16 * CHARS_PER_TOKEN for c in chunks)
+
+def test_blank_pages_are_skipped_and_whitespace_collapsed():
+    chunks = chunk_pages(["  ", "a \t  b", "", "c"], max_tokens=100)
+    assert chunks == [{"text": "a b\nc", "first_page": 2, "last_page": 4}]
+
+def test_oversized_page_splits_at_sections_then_lines():
+    section = "\n".join(["line " + "x" * 10] * 3)
+    page = "\n\n".join([section] * 4)
+    chunks = chunk_pages(["intro", page, "outro"], max_tokens=12)  # 48 characters
+    assert chunks[0] == {"text": "intro", "first_page": 1, "last_page": 1}
+    assert chunks[-1] == {"text": "outro", "first_page": 3, "last_page": 3}
+    middle = chunks[1:-1]
+    assert all(c["first_page"] == c["last_page"] == 2 for c in middle)
+    assert all(len(c["text"]) <= 48 for c in middle)
+    # Nothing is split mid-line when line breaks are available
+    assert all(line == "line " + "x" * 10 for c in middle for line in c["text"].split("\n") if line)
+
+def test_unbreakable_page_is_split_mid_line():
+    chunks = chunk_pages(["x" * 100], max_tokens=10)  # 40 characters
+    assert [len(c["text"]) for c in chunks] == [40, 40, 20]
+    assert "".join(c["text"] for c in chunks) == "x" * 100
+
+def test_coverage_order():
+    assert coverage_order(0, 3) == []
+    assert coverage_order(5, 1) == [0, 1, 2, 3, 4]
+    assert coverage_order(5, 3) == [0, 2, 4, 1, 3]
+    assert coverage_order(3, 10) == [0, 1, 2]
+    assert sorted(coverage_order(10, 4)) == list(range(10))
@@ -0,0 +1,55 @@
+import asyncio
+import pytest
+from app.services import text_store
+from app.services.storage.local import LocalStorage
+
+PAGES = ["First page", "", "Ünïcödé third page", "x" * 5000]
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    backend = LocalStorage(root=str(tmp_path))
+    monkeypatch.setattr(text_store, "get_storage", lambda: backend)
+    return backend
+
+def run(coro):
+    return asyncio.run(coro)
+
+def test_round_trip(storage):
+    run(text_store.write_pages("abc", PAGES))
+    assert run(text_store.has_pages("abc"))
+    assert run(text_store.load_all_pages("abc")) == PAGES
+
+def test_page_ranges(storage):
+    run(text_store.write_pages("abc", PAGES))
+    assert run(text_store.read_pages("abc", 1, 3)) == (PAGES[1:3], 4)
+    assert run(text_store.read_pages("abc", 2, 99)) == (PAGES[2:], 4)
+    assert run(text_store.read_pages("abc", 4)) == ([], 4)
+
+def test_read_page_is_one_based(storage):
+    run(text_store.write_pages("abc", PAGES))
+    assert run(text_store.read_page("abc", 3)) == (PAGES[2], 4)
+    assert run(text_store.read_page("abc", 5)) == (None, 4)
+
+def test_empty_document(storage):
+    run(text_store.write_pages("empty", []))
+    assert run(text_store.load_all_pages("empty")) == []
+
+def test_missing_artifact(storage):
+    assert run(text_store.load_all_pages("missing")) is None
+    with pytest.raises(text_store.TextStoreError):
+        run(text_store.read_pages("missing"))
+
+def test_corrupt_and_truncated_artifacts(storage):
+    run(storage.put_bytes(text_store.text_key("bad"), b"NOTMAGIC" + b"\0" * 8))
+    with pytest.raises(text_store.TextStoreError):
+        run(text_store.read_pages("bad"))
+
+    data = text_store.encode_pages(PAGES)
+    run(storage.put_bytes(text_store.text_key("short"), data[:-10]))
+    with pytest.raises(text_store.TextStoreError):
+        run(text_store.read_pages("short"))
+
+def test_delete(storage):
+    run(text_store.write_pages("abc", PAGES))
+    run(text_store.delete("abc"))
+    assert not run(text_store.has_pages("abc"))